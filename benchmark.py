@@ -0,0 +1,488 @@
+"""Benchmarks for the headless gradient engine.
+
+Each subcommand compares the engine against ``legacy_render_array``, a copy
+of the original mgrid-based renderer, so speedups stay measurable as the
+engine evolves.
+
+Usage:
+    python benchmark.py linear [--sizes 2000x3000,8192x8192] [--repeat 3]
+    python benchmark.py radial [--sizes 2000x3000] [--repeat 3]
+    python benchmark.py parallel [--sizes 10000x10000] [--max-workers 8]
+    python benchmark.py precision [--sizes 2000x3000,8192x8192]
+    python benchmark.py colors [--sizes 2000x3000]
+    python benchmark.py catalog [--sizes 1024x1024] [--count 200]
+    python benchmark.py interpolation [--sizes 2000x3000,7680x4320]
+    python benchmark.py dither [--sizes 2000x3000]
+    python benchmark.py suite [--output results.json] [--repeat 1]
+
+``suite`` times the whole pipeline (render, preview resize, PNG and JPEG
+encode) for every direction and position and writes JSON, so two versions
+can be compared with ``diff`` or a script.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import PIL
+from PIL import Image
+
+from gradient_engine import (GradientSpec, INTERPOLATION_MODES, LINEAR_DIRECTIONS, RADIAL_POSITIONS, Workspace,
+                             index_field, iter_batch, parse_hex_color, radial_center, render_array, render_into)
+from gradient_export import JPEG_QUALITY, write_png
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Sizes benchmarked by default: the GUI default and an 8K square
+DEFAULT_SIZES = ((2000, 3000), (8192, 8192))
+
+# Sizes for the suite: the GUI's largest preview, the GUI default and 8K UHD
+SUITE_SIZES = ((400, 400), (2000, 3000), (7680, 4320))
+
+# Bounding box previews are resized into, as in the GUI
+PREVIEW_BOX = (400, 400)
+
+# Version of the suite's JSON layout
+SUITE_FORMAT = 1
+
+# Dithering should add at most this fraction to render time; slower cases
+# are flagged. Cases that only add a millisecond or so (the plain render is
+# a near-memset) are flagged too but hardly matter.
+DITHER_TARGET = 0.20
+
+
+def legacy_render_array(spec, width, height):
+    """Reference renderer: the original full-grid float64 implementation"""
+    r1, g1, b1 = parse_hex_color(spec.primary_color)
+    r2, g2, b2 = parse_hex_color(spec.secondary_color)
+    rgb_array = np.zeros((height, width, 3), dtype=np.uint8)
+    y_coords, x_coords = np.mgrid[0:height, 0:width]
+
+    if spec.gradient_type == "linear":
+        if spec.direction == "left-to-right":
+            ratio = x_coords / width
+        elif spec.direction == "right-to-left":
+            ratio = 1 - (x_coords / width)
+        elif spec.direction == "top-to-bottom":
+            ratio = y_coords / height
+        elif spec.direction == "bottom-to-top":
+            ratio = 1 - (y_coords / height)
+        elif spec.direction == "top-right-to-bottom-left":
+            ratio = ((width - x_coords) / width + y_coords / height) / 2
+        elif spec.direction == "bottom-left-to-top-right":
+            ratio = (x_coords / width + (height - y_coords) / height) / 2
+        elif spec.direction == "bottom-right-to-top-left":
+            ratio = ((width - x_coords) / width + (height - y_coords) / height) / 2
+        else:
+            ratio = (x_coords / width + y_coords / height) / 2
+    else:
+        center_x, center_y = radial_center(spec.position, width, height)
+        max_dist = (width**2 + height**2)**0.5 / 2
+        dist = np.sqrt((x_coords - center_x)**2 + (y_coords - center_y)**2)
+        ratio = np.minimum(1.0, dist / max_dist)
+
+    rgb_array[..., 0] = (r1 * (1 - ratio) + r2 * ratio).astype(np.uint8)
+    rgb_array[..., 1] = (g1 * (1 - ratio) + g2 * ratio).astype(np.uint8)
+    rgb_array[..., 2] = (b1 * (1 - ratio) + b2 * ratio).astype(np.uint8)
+    return rgb_array
+
+
+def parse_sizes(text):
+    """Parse a comma separated list like ``2000x3000,8192x8192``"""
+    sizes = []
+    for item in text.split(","):
+        width, height = item.lower().split("x")
+        sizes.append((int(width), int(height)))
+    return tuple(sizes)
+
+
+def time_call(func, repeat):
+    """Return the best wall time of ``repeat`` calls, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_calls(funcs, repeat):
+    """Return the best wall time of each callable, alternating between them
+
+    Interleaving the runs keeps noise from other load on the machine from
+    favoring whichever callable happened to run in a quiet moment.
+    """
+    best = [float("inf")] * len(funcs)
+    for _ in range(repeat):
+        for i, func in enumerate(funcs):
+            start = time.perf_counter()
+            func()
+            best[i] = min(best[i], time.perf_counter() - start)
+    return best
+
+
+def peak_memory(func):
+    """Return the peak traced allocation of one call, in bytes"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(func, repeat):
+    """Return (best seconds, peak bytes) for a render callable"""
+    return time_call(func, repeat), peak_memory(func)
+
+
+def compare_with_legacy(args, specs, label):
+    """Print engine vs. legacy time and peak memory for ``(name, spec)`` pairs"""
+    print(f"{'size':>11} {label:<26} {'legacy ms':>10} {'engine ms':>10} "
+          f"{'speedup':>8} {'legacy B/px':>12} {'engine B/px':>12}")
+    for width, height in args.sizes:
+        pixels = width * height
+        run_legacy = pixels <= args.legacy_max_mp * 1e6
+        for name, spec in specs:
+            engine_s, engine_peak = measure(lambda: render_array(spec, width, height), args.repeat)
+            if run_legacy:
+                legacy_s, legacy_peak = measure(lambda: legacy_render_array(spec, width, height), args.repeat)
+                legacy_cols = f"{legacy_s * 1000:10.1f}"
+                speedup = f"{legacy_s / engine_s:7.1f}x"
+                legacy_bpp = f"{legacy_peak / pixels:12.1f}"
+            else:
+                # The legacy renderer needs ~100 bytes/pixel; skip it for huge sizes
+                legacy_cols = f"{'skipped':>10}"
+                speedup = f"{'-':>8}"
+                legacy_bpp = f"{'-':>12}"
+            print(f"{width:>5}x{height:<5} {name:<26} {legacy_cols} {engine_s * 1000:10.1f} "
+                  f"{speedup} {legacy_bpp} {engine_peak / pixels:12.1f}")
+
+
+def bench_linear(args):
+    """Separable linear engine vs. the legacy full-grid renderer"""
+    specs = [(direction, GradientSpec(direction=direction)) for direction in LINEAR_DIRECTIONS]
+    compare_with_legacy(args, specs, "direction")
+
+
+def bench_radial(args):
+    """Broadcast/mirrored radial engine vs. the legacy full-grid renderer"""
+    specs = [(position, GradientSpec(gradient_type="radial", position=position)) for position in RADIAL_POSITIONS]
+    compare_with_legacy(args, specs, "position")
+
+
+def bench_parallel(args):
+    """Scaling of multi-threaded band rendering from 1 to N workers"""
+    max_workers = args.max_workers or os.cpu_count() or 1
+    worker_counts = sorted({1, max_workers} | {n for n in (2, 4, 8, 16, 32) if n < max_workers})
+    specs = (
+        GradientSpec(gradient_type="linear", direction="top-left-to-bottom-right"),
+        GradientSpec(gradient_type="radial", position="center"),
+    )
+    print(f"{'size':>11} {'gradient':<10} {'workers':>7} {'ms':>9} {'MP/s':>8} {'scaling':>8}")
+    for width, height in args.sizes:
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        megapixels = width * height / 1e6
+        for spec in specs:
+            single = None
+            for workers in worker_counts:
+                seconds = time_call(lambda: render_into(spec, out, workers=workers), args.repeat)
+                single = single or seconds
+                print(f"{width:>5}x{height:<5} {spec.gradient_type:<10} {workers:>7} {seconds * 1000:9.1f} "
+                      f"{megapixels / seconds:8.1f} {single / seconds:7.2f}x")
+
+
+def bench_precision(args):
+    """float64 vs. float32 with a reused workspace, against the legacy renderer"""
+    specs = (
+        GradientSpec(gradient_type="radial", position="center"),
+        GradientSpec(gradient_type="linear", direction="top-left-to-bottom-right"),
+    )
+    print(f"{'size':>11} {'gradient':<10} {'mode':<18} {'ms':>9} {'peak B/px':>10} {'max diff':>9}")
+    for width, height in args.sizes:
+        pixels = width * height
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        for spec in specs:
+            reference = render_array(spec, width, height)
+            workspace = Workspace()
+            modes = [
+                ("engine float64", lambda: render_into(spec, out)),
+                ("engine float32+ws", lambda: render_into(spec, out, dtype=np.float32, workspace=workspace)),
+            ]
+            if pixels <= args.legacy_max_mp * 1e6:
+                modes.insert(0, ("legacy", lambda: np.copyto(out, legacy_render_array(spec, width, height))))
+            for name, func in modes:
+                seconds, peak = measure(func, args.repeat)
+                # The output buffer is shared, so peak is temporaries only
+                diff = np.abs(out.astype(np.int16) - reference).max()
+                print(f"{width:>5}x{height:<5} {spec.gradient_type:<10} {name:<18} {seconds * 1000:9.1f} "
+                      f"{peak / pixels:10.2f} {diff:9d}")
+
+
+def bench_colors(args):
+    """Color-only changes: full radial render vs. a gather over a cached index field"""
+    print(f"{'size':>11} {'position':<14} {'field ms':>9} {'full ms':>9} {'cached ms':>10} {'speedup':>8}")
+    for width, height in args.sizes:
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        for position in RADIAL_POSITIONS:
+            spec = GradientSpec(gradient_type="radial", position=position)
+            field = None
+
+            def compute_field():
+                nonlocal field
+                field = index_field(spec, width, height)
+
+            field_s = time_call(compute_field, args.repeat)
+            full_s = time_call(lambda: render_into(spec, out), args.repeat)
+            cached_s = time_call(lambda: render_into(spec._replace(primary_color="#123456"), out,
+                                                     index_field=field), args.repeat)
+            print(f"{width:>5}x{height:<5} {position:<14} {field_s * 1000:9.1f} {full_s * 1000:9.1f} "
+                  f"{cached_s * 1000:10.1f} {full_s / cached_s:7.1f}x")
+
+
+def bench_catalog(args):
+    """N color pairs on one geometry: a render_array call per image vs. iter_batch"""
+    rng = random.Random(0)
+    pairs = [("#%06x" % rng.randrange(1 << 24), "#%06x" % rng.randrange(1 << 24)) for _ in range(args.count)]
+    specs = (
+        GradientSpec(gradient_type="linear", direction="top-left-to-bottom-right"),
+        GradientSpec(gradient_type="radial", position="center"),
+        GradientSpec(gradient_type="radial", position="top-left"),
+    )
+    print(f"{'size':>11} {'gradient':<10} {'variant':<26} {'single img/s':>13} {'batch img/s':>12} {'speedup':>8}")
+    for width, height in args.sizes:
+        for spec in specs:
+            def single():
+                for primary, secondary in pairs:
+                    render_array(spec._replace(primary_color=primary, secondary_color=secondary), width, height)
+
+            def batch():
+                for _ in iter_batch(spec, width, height, pairs):
+                    pass
+
+            single_s = time_call(single, args.repeat)
+            batch_s = time_call(batch, args.repeat)
+            variant = spec.direction if spec.gradient_type == "linear" else spec.position
+            print(f"{width:>5}x{height:<5} {spec.gradient_type:<10} {variant:<26} {args.count / single_s:13.1f} "
+                  f"{args.count / batch_s:12.1f} {single_s / batch_s:7.2f}x")
+
+
+def bench_interpolation(args):
+    """Render time per interpolation color space, relative to plain srgb"""
+    specs = (
+        GradientSpec(gradient_type="linear", direction="top-left-to-bottom-right", stops=((0.5, "#ffcc00"),)),
+        GradientSpec(gradient_type="radial", position="center", stops=((0.5, "#ffcc00"),)),
+    )
+    print(f"{'size':>11} {'gradient':<10} {'interpolation':<14} {'ms':>9} {'vs srgb':>8}")
+    for width, height in args.sizes:
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        for spec in specs:
+            baseline = None
+            for mode in INTERPOLATION_MODES:
+                seconds = time_call(lambda: render_into(spec._replace(interpolation=mode), out), args.repeat)
+                baseline = baseline or seconds
+                print(f"{width:>5}x{height:<5} {spec.gradient_type:<10} {mode:<14} {seconds * 1000:9.1f} "
+                      f"{seconds / baseline:7.2f}x")
+
+
+def bench_dither(args):
+    """Cost of ordered dithering on low-contrast gradients, with and without a cached index field"""
+    cases = [(direction, GradientSpec("#202830", "#283038", direction=direction))
+             for direction in LINEAR_DIRECTIONS]
+    cases += [(position, GradientSpec("#202830", "#283038", gradient_type="radial", position=position))
+              for position in RADIAL_POSITIONS]
+    print(f"{'size':>11} {'variant':<26} {'field':<6} {'plain ms':>9} {'dither ms':>10} {'overhead':>9}")
+    over = 0
+    for width, height in args.sizes:
+        out = np.empty((height, width, 3), dtype=np.uint8)
+        for name, spec in cases:
+            fields = [None]
+            if spec.gradient_type == "radial":
+                fields.append(index_field(spec, width, height))
+            for field in fields:
+                plain_s, dither_s = time_calls(
+                    [lambda: render_into(spec, out, index_field=field),
+                     lambda: render_into(spec._replace(dither=True), out, index_field=field)], args.repeat)
+                overhead = dither_s / plain_s - 1
+                flag = ""
+                if overhead > DITHER_TARGET:
+                    over += 1
+                    flag = f"  over target (+{(dither_s - plain_s) * 1000:.1f} ms)"
+                print(f"{width:>5}x{height:<5} {name:<26} {'yes' if field is not None else 'no':<6} "
+                      f"{plain_s * 1000:9.1f} {dither_s * 1000:10.1f} {overhead:8.0%}{flag}")
+    print(f"{over} case(s) over the {DITHER_TARGET:.0%} target")
+
+
+def peak_rss():
+    """Return this process's peak resident set size in bytes, or None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def stage_result(seconds, pixels, **extra):
+    result = {"seconds": round(seconds, 6), "mp_per_s": round(pixels / 1e6 / seconds, 3) if seconds else None}
+    result.update(extra)
+    return result
+
+
+def run_suite_case(spec, width, height, repeat, workers):
+    """Time every pipeline stage for one gradient; runs in a fresh process
+
+    A process per case makes the peak RSS figure belong to that case alone.
+    """
+    baseline_rss = peak_rss()
+    pixels = width * height
+    stages = {}
+
+    array = None
+
+    def render():
+        nonlocal array
+        array = render_array(spec, width, height, workers=workers)
+
+    stages["render"] = stage_result(time_call(render, repeat), pixels)
+
+    # Preview downscale, as the GUI used to do before rendering previews directly
+    image = Image.fromarray(array)
+    scale = min(PREVIEW_BOX[0] / width, PREVIEW_BOX[1] / height)
+    preview_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    stages["resize"] = stage_result(time_call(lambda: image.resize(preview_size, Image.LANCZOS), repeat),
+                                    pixels, size=list(preview_size))
+
+    with tempfile.TemporaryDirectory() as directory:
+        png_path = os.path.join(directory, "bench.png")
+        rows = max(1, (4 * 1024 * 1024) // (width * 3))
+        strips = lambda: ((y0, array[y0:y0 + rows]) for y0 in range(0, height, rows))
+        seconds = time_call(lambda: write_png(png_path, width, height, strips()), repeat)
+        stages["encode_png"] = stage_result(seconds, pixels, bytes=os.path.getsize(png_path))
+
+        jpg_path = os.path.join(directory, "bench.jpg")
+        seconds = time_call(lambda: image.save(jpg_path, "JPEG", quality=JPEG_QUALITY), repeat)
+        stages["encode_jpg"] = stage_result(seconds, pixels, bytes=os.path.getsize(jpg_path))
+
+    return {
+        "gradient": spec.gradient_type,
+        "variant": spec.direction if spec.gradient_type == "linear" else spec.position,
+        "width": width,
+        "height": height,
+        "megapixels": round(pixels / 1e6, 3),
+        "stages": stages,
+        "total_seconds": round(sum(stage["seconds"] for stage in stages.values()), 6),
+        "baseline_rss_bytes": baseline_rss,
+        "peak_rss_bytes": peak_rss(),
+    }
+
+
+def bench_suite(args):
+    """Render/resize/encode timings, MP/s and peak RSS for every gradient, as JSON"""
+    specs = [GradientSpec(direction=direction) for direction in LINEAR_DIRECTIONS]
+    specs += [GradientSpec(gradient_type="radial", position=position) for position in RADIAL_POSITIONS]
+
+    results = []
+    # maxtasksperchild=1 gives every case a fresh process
+    with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+        for width, height in args.sizes:
+            for spec in specs:
+                result = pool.apply(run_suite_case, (spec, width, height, args.repeat, args.workers))
+                results.append(result)
+                print(f"{width}x{height} {result['gradient']} {result['variant']}: "
+                      f"{result['total_seconds'] * 1000:.1f} ms", file=sys.stderr)
+
+    report = {
+        "format": SUITE_FORMAT,
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pillow": PIL.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "settings": {"repeat": args.repeat, "workers": args.workers},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+
+def add_common_arguments(parser, default_sizes=DEFAULT_SIZES):
+    """Options shared by every benchmark subcommand"""
+    parser.add_argument("--sizes", type=parse_sizes, default=default_sizes,
+                        help="comma separated WIDTHxHEIGHT list")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is reported)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    linear = subparsers.add_parser("linear", help=bench_linear.__doc__)
+    linear.set_defaults(func=bench_linear)
+    add_common_arguments(linear)
+    linear.add_argument("--legacy-max-mp", type=float, default=20,
+                        help="skip the legacy renderer above this many megapixels")
+
+    radial = subparsers.add_parser("radial", help=bench_radial.__doc__)
+    radial.set_defaults(func=bench_radial)
+    add_common_arguments(radial)
+    radial.add_argument("--legacy-max-mp", type=float, default=20,
+                        help="skip the legacy renderer above this many megapixels")
+
+    parallel = subparsers.add_parser("parallel", help=bench_parallel.__doc__)
+    parallel.set_defaults(func=bench_parallel)
+    add_common_arguments(parallel, default_sizes=((10000, 10000),))
+    parallel.add_argument("--max-workers", type=int, default=None,
+                          help="largest worker count to try (default: all cores)")
+
+    precision = subparsers.add_parser("precision", help=bench_precision.__doc__)
+    precision.set_defaults(func=bench_precision)
+    add_common_arguments(precision)
+    precision.add_argument("--legacy-max-mp", type=float, default=20,
+                           help="skip the legacy renderer above this many megapixels")
+
+    colors = subparsers.add_parser("colors", help=bench_colors.__doc__)
+    colors.set_defaults(func=bench_colors)
+    add_common_arguments(colors, default_sizes=((2000, 3000),))
+
+    catalog = subparsers.add_parser("catalog", help=bench_catalog.__doc__)
+    catalog.set_defaults(func=bench_catalog)
+    add_common_arguments(catalog, default_sizes=((1024, 1024),))
+    catalog.add_argument("--count", type=int, default=200, help="color pairs per geometry")
+
+    interpolation = subparsers.add_parser("interpolation", help=bench_interpolation.__doc__)
+    interpolation.set_defaults(func=bench_interpolation)
+    add_common_arguments(interpolation, default_sizes=((2000, 3000), (7680, 4320)))
+
+    dither = subparsers.add_parser("dither", help=bench_dither.__doc__)
+    dither.set_defaults(func=bench_dither)
+    add_common_arguments(dither, default_sizes=((2000, 3000),))
+    dither.set_defaults(repeat=15)
+
+    suite = subparsers.add_parser("suite", help=bench_suite.__doc__)
+    suite.set_defaults(func=bench_suite)
+    add_common_arguments(suite, default_sizes=SUITE_SIZES)
+    suite.add_argument("--workers", type=int, default=1, help="render threads (default: 1)")
+    suite.add_argument("-o", "--output", default=None, help="write the JSON report here instead of stdout")
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
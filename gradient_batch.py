@@ -0,0 +1,269 @@
+"""Command-line batch renderer for gradient spec files.
+
+Reads a JSON or CSV list of gradients and renders them all on a process
+pool, without starting the Tk GUI.
+
+JSON input is a list of objects (or ``{"gradients": [...]}``); CSV input has
+a header row. Recognized fields, all optional:
+
+    primary_color, secondary_color, gradient_type, direction, position,
+    stops, interpolation (srgb, srgb-linear or oklab), dither (true/false),
+    width, height, format (png, jpg, npy or rgb), output (file name override)
+
+``stops`` adds color stops between the primary and secondary color, either
+CSS style (``"#ffcc00 40%, #00aa88 70%"``) or, in JSON, as a list of
+``[offset, color]`` pairs with offsets from 0 to 1.
+
+Default file names leave out the direction and position; when two different
+gradients in one batch would get the same name, the later one has its
+direction or position added (``c5022f-8ef9e0_lg-left-to-right_1024x1024.png``).
+
+npy and rgb outputs are uncompressed and rendered straight into a
+memory-mapped file; see gradient_export.RAW_FORMATS.
+
+Usage:
+    python gradient_batch.py specs.json -o output -j 8 [--cache-dir .cache [--cache-max-bytes N]]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+from gradient_cache import DEFAULT_MAX_DISK_BYTES, RenderCache, cache_key, max_disk_bytes_from_env
+from gradient_engine import (GRADIENT_TYPES, INTERPOLATION_MODES, LINEAR_DIRECTIONS, RADIAL_POSITIONS, GradientSpec,
+                             default_filename, normalize_hex_color, parse_color_stops)
+from gradient_export import EXPORT_FORMATS, RAW_FORMATS, open_raw_output, save_jpg, save_png_streaming, save_raw, write_png
+
+# Same defaults as the GUI
+DEFAULT_WIDTH = 1024
+DEFAULT_HEIGHT = 1024
+DEFAULT_FORMAT = "png"
+FORMATS = EXPORT_FORMATS
+
+
+class RenderJob:
+    """One gradient to render: spec, size, format and destination"""
+
+    def __init__(self, spec, width, height, image_format, output_path, cache_dir=None,
+                 cache_max_bytes=DEFAULT_MAX_DISK_BYTES):
+        self.spec = spec
+        self.width = width
+        self.height = height
+        self.image_format = image_format
+        self.output_path = output_path
+        self.cache_dir = cache_dir
+        self.cache_max_bytes = cache_max_bytes
+
+
+# Disk-only render caches, one per directory, created lazily in each worker process
+_caches = {}
+
+
+def _disk_cache(cache_dir, max_disk_bytes):
+    cache = _caches.get(cache_dir)
+    if cache is None:
+        cache = _caches[cache_dir] = RenderCache(max_bytes=0, disk_dir=cache_dir, max_disk_bytes=max_disk_bytes)
+    return cache
+
+
+def load_entries(file_path):
+    """Read raw gradient entries (dicts) from a ``.json`` or ``.csv`` file"""
+    if file_path.lower().endswith(".csv"):
+        with open(file_path, newline="", encoding="utf-8") as file:
+            # Empty cells mean "use the default"
+            return [{k: v for k, v in row.items() if v not in (None, "")} for row in csv.DictReader(file)]
+
+    with open(file_path, encoding="utf-8") as file:
+        data = json.load(file)
+    if isinstance(data, dict):
+        data = data.get("gradients", [])
+    if not isinstance(data, list):
+        raise ValueError("JSON spec file must contain a list of gradients")
+    return data
+
+
+def parse_stops(value):
+    """Read an entry's ``stops`` field: a CSS-style string or a list of [offset, color] pairs"""
+    if isinstance(value, str):
+        return parse_color_stops(value)
+    return tuple((float(offset), normalize_hex_color(color)) for offset, color in value)
+
+
+def parse_flag(value):
+    """Read a boolean field; CSV cells arrive as strings such as ``"true"`` or ``"0"``"""
+    if isinstance(value, str):
+        if value.strip().lower() in ("1", "true", "yes", "on"):
+            return True
+        if value.strip().lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(f"Invalid boolean: {value!r}")
+    return bool(value)
+
+
+def _check_choice(entry, field, choices, default):
+    """Return an entry's field, which must be one of ``choices``"""
+    value = entry.get(field, default)
+    if value not in choices:
+        raise ValueError(f"Invalid {field}: {value!r} (expected one of {', '.join(choices)})")
+    return value
+
+
+def job_from_entry(entry, output_dir, cache_dir=None, variant=False, cache_max_bytes=DEFAULT_MAX_DISK_BYTES):
+    """Validate one raw entry and turn it into a RenderJob
+
+    Args:
+        cache_dir, cache_max_bytes: Disk render cache to use, and its size limit
+        variant: Put the direction or position in the default file name
+            (see default_filename)
+    """
+    if not isinstance(entry, dict):
+        raise ValueError(f"Expected an object, got {entry!r}")
+    defaults = GradientSpec()
+    spec = GradientSpec(
+        primary_color=normalize_hex_color(entry.get("primary_color", defaults.primary_color)),
+        secondary_color=normalize_hex_color(entry.get("secondary_color", defaults.secondary_color)),
+        gradient_type=_check_choice(entry, "gradient_type", GRADIENT_TYPES, defaults.gradient_type),
+        direction=_check_choice(entry, "direction", LINEAR_DIRECTIONS, defaults.direction),
+        position=_check_choice(entry, "position", RADIAL_POSITIONS, defaults.position),
+        stops=parse_stops(entry.get("stops", ())),
+        interpolation=_check_choice(entry, "interpolation", INTERPOLATION_MODES, defaults.interpolation),
+        dither=parse_flag(entry.get("dither", defaults.dither))
+    )
+    width = int(entry.get("width", DEFAULT_WIDTH))
+    height = int(entry.get("height", DEFAULT_HEIGHT))
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid size {width}x{height}")
+    image_format = str(entry.get("format", DEFAULT_FORMAT)).lower().replace("jpeg", "jpg")
+    if image_format not in FORMATS:
+        raise ValueError(f"Unsupported format: {image_format}")
+    name = entry.get("output") or default_filename(spec, width, height, image_format, variant=variant)
+    return RenderJob(spec, width, height, image_format, os.path.join(output_dir, name), cache_dir, cache_max_bytes)
+
+
+def run_job(job):
+    """Render and save one job; runs inside a worker process
+
+    Returns:
+        (output_path, pixel count, seconds)
+    """
+    start = time.perf_counter()
+    if job.cache_dir:
+        # Reuse (or populate) the shared on-disk render cache
+        array = _disk_cache(job.cache_dir, job.cache_max_bytes).get_or_render(job.spec, job.width, job.height)
+        if job.image_format == "png":
+            write_png(job.output_path, job.width, job.height, [(0, array)])
+        elif job.image_format in RAW_FORMATS:
+            output = open_raw_output(job.output_path, job.width, job.height, job.image_format)
+            output[...] = array
+            output.flush()
+        else:
+            save_jpg(job.spec, job.width, job.height, job.output_path, image=Image.fromarray(array))
+    elif job.image_format == "png":
+        save_png_streaming(job.spec, job.width, job.height, job.output_path)
+    elif job.image_format in RAW_FORMATS:
+        save_raw(job.spec, job.width, job.height, job.output_path, job.image_format)
+    else:
+        save_jpg(job.spec, job.width, job.height, job.output_path)
+    return job.output_path, job.width * job.height, time.perf_counter() - start
+
+
+def run_batch(jobs, workers=None, verbose=True):
+    """Render jobs on a process pool and return (rendered, failed, pixels)"""
+    rendered = failed = pixels = 0
+
+    def report(result):
+        nonlocal rendered, pixels
+        path, job_pixels, seconds = result
+        rendered += 1
+        pixels += job_pixels
+        if verbose:
+            print(f"Rendered {path} ({seconds:.2f}s)")
+
+    if workers == 1:
+        # Render in-process; easier to debug and no pool startup cost
+        for job in jobs:
+            try:
+                report(run_job(job))
+            except Exception as e:
+                failed += 1
+                print(f"Error rendering {job.output_path}: {e}", file=sys.stderr)
+        return rendered, failed, pixels
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            try:
+                report(future.result())
+            except Exception as e:
+                failed += 1
+                print(f"Error rendering {futures[future].output_path}: {e}", file=sys.stderr)
+    return rendered, failed, pixels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a batch of gradients from a JSON or CSV spec file")
+    parser.add_argument("spec_file", help="JSON or CSV file listing the gradients")
+    parser.add_argument("-o", "--output-dir", default="output", help="directory for rendered images (default: output)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--overwrite", action="store_true", help="re-render outputs that already exist")
+    parser.add_argument("--cache-dir", default=None,
+                        help="reuse renders from (and add them to) an on-disk render cache")
+    parser.add_argument("--cache-max-bytes", type=int, default=None,
+                        help="size limit of the render cache directory; oldest entries are deleted first, "
+                             "0 for no limit (default: GRADIENT_CACHE_MAX_BYTES or 512 MiB)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print the summary")
+    args = parser.parse_args(argv)
+    cache_max_bytes = max_disk_bytes_from_env() if args.cache_max_bytes is None else args.cache_max_bytes
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = []
+    invalid = skipped = 0
+    seen = {}  # Output path -> (entry index, render key) of the job writing it
+    for index, entry in enumerate(load_entries(args.spec_file)):
+        try:
+            job = job_from_entry(entry, args.output_dir, args.cache_dir, cache_max_bytes=cache_max_bytes)
+            key = cache_key(job.spec, job.width, job.height)
+            if job.output_path in seen and seen[job.output_path][1] != key and not entry.get("output"):
+                # Default names leave out the direction and position; add
+                # them when two different gradients would share a name
+                job = job_from_entry(entry, args.output_dir, args.cache_dir, variant=True,
+                                     cache_max_bytes=cache_max_bytes)
+        except (TypeError, ValueError) as e:
+            invalid += 1
+            print(f"Skipping entry {index}: {e}", file=sys.stderr)
+            continue
+        if job.output_path in seen:
+            other, other_key = seen[job.output_path]
+            if other_key == key:
+                # The same gradient twice; render it once
+                skipped += 1
+            else:
+                invalid += 1
+                print(f"Skipping entry {index}: output {job.output_path} is already used by entry {other}",
+                      file=sys.stderr)
+            continue
+        seen[job.output_path] = (index, key)
+        # Skip outputs that already exist
+        if not args.overwrite and os.path.exists(job.output_path):
+            skipped += 1
+            continue
+        jobs.append(job)
+
+    start = time.perf_counter()
+    rendered, failed, pixels = run_batch(jobs, workers=args.jobs, verbose=not args.quiet)
+    elapsed = time.perf_counter() - start
+
+    print(f"{rendered} rendered, {skipped} skipped, {failed + invalid} failed in {elapsed:.2f}s")
+    if rendered and elapsed > 0:
+        print(f"Throughput: {rendered / elapsed:.2f} images/s, {pixels / 1e6 / elapsed:.1f} MP/s")
+    return 1 if failed or invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
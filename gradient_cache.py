@@ -0,0 +1,325 @@
+"""Content-addressed cache for rendered gradients.
+
+Renders are keyed on the normalized spec plus the pixel size, so any two
+requests that would produce identical pixels share one entry. The memory
+tier is an LRU bounded by a byte budget; an optional disk tier keeps
+``.npy`` files named by the key's digest, so renders survive across GUI
+sessions and batch runs. The disk tier is trimmed to its own size limit
+(GRADIENT_CACHE_MAX_BYTES, 512 MiB by default), oldest files first.
+
+GeometryCache holds the color-independent half of a render, the palette
+index field, so changing only the colors skips the per-pixel math.
+"""
+import hashlib
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from gradient_engine import index_field, render_array
+
+# Default memory budget: roughly 28 renders at 1024x1024, or 14 at 2000x3000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Default size limit for the disk tier: about 20 renders at 2000x3000
+DEFAULT_MAX_DISK_BYTES = 512 * 1024 * 1024
+
+# Default budget for index fields (1 byte per pixel): 21 fields at 2000x3000
+DEFAULT_GEOMETRY_MAX_BYTES = 128 * 1024 * 1024
+
+
+def cache_key(spec, width, height):
+    """Return the hashable cache key for a render"""
+    return tuple(spec.normalized()) + (int(width), int(height))
+
+
+def geometry_key(spec, width, height):
+    """Return the cache key for a render's geometry: everything but the colors"""
+    spec = spec.normalized()
+    return (spec.gradient_type, spec.direction, spec.position, int(width), int(height))
+
+
+def max_disk_bytes_from_env(environ=None):
+    """Return the disk tier limit from GRADIENT_CACHE_MAX_BYTES, or the default
+
+    0 means no limit. Invalid values fall back to the default.
+    """
+    environ = os.environ if environ is None else environ
+    value = environ.get("GRADIENT_CACHE_MAX_BYTES")
+    if not value:
+        return DEFAULT_MAX_DISK_BYTES
+    try:
+        return max(0, int(value))
+    except ValueError:
+        print(f"Ignoring invalid GRADIENT_CACHE_MAX_BYTES: {value!r}")
+        return DEFAULT_MAX_DISK_BYTES
+
+
+def key_digest(key):
+    """Return a stable hex digest for a cache key, used as the disk file name"""
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Thread-safe LRU cache of rendered ``(height, width, 3)`` uint8 arrays
+
+    Cached arrays are marked read-only because they are shared between
+    callers; copy one before modifying it.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, disk_dir=None, max_disk_bytes=DEFAULT_MAX_DISK_BYTES,
+                 background_writes=False):
+        """
+        Args:
+            max_bytes: Memory budget in bytes; 0 disables the memory tier
+            disk_dir: Directory for the on-disk tier, or None to disable it
+            max_disk_bytes: Size limit for the disk tier in bytes; None or 0 for no limit
+            background_writes: Write disk entries on a background thread, so
+                put() doesn't wait for np.save (flush() waits for them)
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._writes = queue.Queue() if background_writes else None
+        self._writer = None
+
+        # Statistics
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @property
+    def current_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, spec, width, height):
+        """Return the cached render, or None on a miss"""
+        key = cache_key(spec, width, height)
+        with self._lock:
+            array = self._entries.get(key)
+            if array is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return array
+
+        array = self._load_from_disk(key)
+        with self._lock:
+            if array is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, array)
+        return array
+
+    def put(self, spec, width, height, array, persist=True):
+        """Add a render to the cache
+
+        Args:
+            persist: Also write it to the disk tier, if enabled; throwaway
+                renders (e.g. progressive preview stages) pass False
+        """
+        key = cache_key(spec, width, height)
+        array.setflags(write=False)
+        with self._lock:
+            self._store(key, array)
+        if not (persist and self.disk_dir):
+            return
+        if self._writes is None:
+            self._save_to_disk(key, array)
+        else:
+            self._start_writer()
+            self._writes.put((key, array))
+
+    def get_or_render(self, spec, width, height, render_func=render_array, persist=True):
+        """Return the cached render, rendering and caching it on a miss
+
+        Args:
+            render_func: Called as ``render_func(spec, width, height)`` on a miss
+            persist: As for put()
+        """
+        array = self.get(spec, width, height)
+        if array is None:
+            array = render_func(spec, width, height)
+            self.put(spec, width, height, array, persist)
+        return array
+
+    def flush(self):
+        """Wait until every queued disk write has finished"""
+        if self._writes is not None:
+            self._writes.join()
+
+    def clear(self):
+        """Drop every entry from the memory tier"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _store(self, key, array):
+        # Caller holds the lock
+        if array.nbytes > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous.nbytes
+        self._entries[key] = array
+        self._bytes += array.nbytes
+        # Evict least recently used entries until we're back under budget
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="render-cache-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            key, array = self._writes.get()
+            try:
+                self._save_to_disk(key, array)
+            finally:
+                self._writes.task_done()
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key_digest(key) + ".npy")
+
+    def _load_from_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            array = np.load(path)
+        except (OSError, ValueError):
+            # Missing or corrupt entry; treat as a miss
+            return None
+        if array.dtype != np.uint8 or array.shape != (key[-1], key[-2], 3):
+            return None
+        # Refresh the modification time so disk eviction is LRU as well
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        array.setflags(write=False)
+        return array
+
+    def _save_to_disk(self, key, array):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        # Write to a temporary name first so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as file:
+                np.save(file, array)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Failed to write render cache entry: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        """Delete the least recently used files until the disk tier fits its limit"""
+        if not self.max_disk_bytes:
+            return
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".npy"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class GeometryCache:
+    """Thread-safe LRU cache of palette index fields, keyed by geometry
+
+    Fields come from ``gradient_engine.index_field`` and are read-only.
+    Gradients without a field (linear ones) are not stored; for them
+    get_or_compute returns None, which render_array treats as "no field".
+    """
+
+    def __init__(self, max_bytes=DEFAULT_GEOMETRY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def current_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, spec, width, height, cancel=None):
+        """Return the index field for a render's geometry, computing it on a miss
+
+        Args:
+            cancel: Optional cancellation token passed to the computation
+        """
+        if spec.gradient_type == "linear":
+            return None
+        key = geometry_key(spec, width, height)
+        with self._lock:
+            field = self._entries.get(key)
+            if field is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return field
+            self.misses += 1
+
+        field = index_field(spec, width, height, cancel=cancel)
+        if field is None or field.nbytes > self.max_bytes:
+            return field
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = field
+            self._bytes += field.nbytes
+            # Evict least recently used fields until we're back under budget
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+        return field
+
+    def clear(self):
+        """Drop every field"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,1135 @@
+"""Headless gradient rendering engine.
+
+This module holds everything needed to turn a gradient description into
+pixels. It deliberately imports neither tkinter nor ImageTk, so it can be
+used from batch workers, process pools and display-less servers; the Tk
+GUI in ``gradient_generator.py`` is just one of its callers.
+"""
+import copy
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+from PIL import Image
+
+# Supported gradient types
+GRADIENT_TYPES = ("linear", "radial")
+
+# Supported directions for linear gradients (in the order shown in the GUI)
+LINEAR_DIRECTIONS = (
+    "left-to-right",
+    "right-to-left",
+    "top-to-bottom",
+    "bottom-to-top",
+    "top-left-to-bottom-right",
+    "top-right-to-bottom-left",
+    "bottom-left-to-top-right",
+    "bottom-right-to-top-left"
+)
+
+# Supported center positions for radial gradients (in the order shown in the GUI)
+RADIAL_POSITIONS = (
+    "center",
+    "top",
+    "top-right",
+    "right",
+    "bottom-right",
+    "bottom",
+    "bottom-left",
+    "left",
+    "top-left"
+)
+
+# Number of entries in a two-color palette. Output is 8-bit, so 256 steps
+# keep the quantized ratio within half a color level of the exact blend.
+PALETTE_SIZE = 256
+
+# Default ceiling for the working memory of one strip (output rows plus
+# temporaries). Peak memory of a strip render stays near this value no
+# matter how large the image is.
+DEFAULT_MAX_MEMORY = 64 * 1024 * 1024
+
+# Color spaces colors can be blended in, named as in CSS Color 4:
+#   srgb        - the gamma-encoded bytes (the original behaviour)
+#   srgb-linear - linear-light sRGB; no dark, muddy midpoints
+#   oklab       - perceptually uniform; even lightness and hue steps
+# The conversions only run over the palette (a few hundred entries), never
+# per pixel, so every mode renders at the same speed.
+INTERPOLATION_MODES = ("srgb", "srgb-linear", "oklab")
+
+# Linear-light value of each 8-bit sRGB level
+SRGB_TO_LINEAR = np.where(np.arange(256) / 255 <= 0.04045,
+                          np.arange(256) / 255 / 12.92,
+                          ((np.arange(256) / 255 + 0.055) / 1.055) ** 2.4)
+SRGB_TO_LINEAR.flags.writeable = False
+
+# OKLab matrices (https://bottosson.github.io/posts/oklab/): linear sRGB to
+# LMS cone response, and cube-rooted LMS to Lab
+_LINEAR_TO_LMS = np.array([[0.4122214708, 0.5363325363, 0.0514459929],
+                           [0.2119034982, 0.6806995451, 0.1073969566],
+                           [0.0883024619, 0.2817188376, 0.6299787005]])
+_LMS_TO_OKLAB = np.array([[0.2104542553, 0.7936177850, -0.0040720468],
+                          [1.9779984951, -2.4285922050, 0.4505937099],
+                          [0.0259040371, 0.7827717662, -0.8086757660]])
+_LMS_TO_LINEAR = np.linalg.inv(_LINEAR_TO_LMS)
+_OKLAB_TO_LMS = np.linalg.inv(_LMS_TO_OKLAB)
+
+# Side of the ordered-dither (Bayer) tile. Dithering adds a threshold from
+# this tile to each pixel before quantizing to 8 bits, which turns banding
+# on long, low-contrast gradients into fine, regular noise. An 8x8 tile
+# gives 64 threshold levels, plenty for steps of one 8-bit level.
+DITHER_TILE_SIZE = 8
+DITHER_LEVELS = DITHER_TILE_SIZE ** 2
+
+# Dithered palette indices are built in chunks of about this many bytes,
+# which stay in cache between being written and gathered from
+DITHER_CHUNK_BYTES = 1024 * 1024
+
+# Floating point types the engine can compute in. float64 is the default and
+# reproduces the original renderer; float32 halves the memory traffic of the
+# per-pixel radial math and can shift a pixel by one 8-bit level.
+COMPUTE_DTYPES = (np.float64, np.float32)
+
+
+class RenderCancelled(Exception):
+    """Raised when a render's cancel token is set before it finishes"""
+
+
+class GradientSpec(NamedTuple):
+    """Immutable description of a gradient, independent of its pixel size
+
+    The primary color sits at 0% and the secondary color at 100%. ``stops``
+    adds color stops in between, as ``(offset, color)`` pairs with offsets
+    from 0.0 to 1.0, in order (see ``parse_color_stops``). ``interpolation``
+    is the color space colors are blended in, one of INTERPOLATION_MODES.
+    ``dither`` adds ordered dithering, which hides banding when close colors
+    are stretched over a large image.
+    """
+    primary_color: str = "#c5022f"
+    secondary_color: str = "#8ef9e0"
+    gradient_type: str = "linear"
+    direction: str = "top-left-to-bottom-right"
+    position: str = "center"
+    stops: tuple = ()
+    interpolation: str = "srgb"
+    dither: bool = False
+
+    def color_stops(self):
+        """Return every stop, ends included, as ``((offset, color), ...)``
+
+        Offsets are clamped to [0, 1] and, as in CSS, a stop placed before
+        the previous one is moved up to it.
+        """
+        stops = [(0.0, self.primary_color)]
+        for offset, color in self.stops:
+            stops.append((min(1.0, max(float(offset), stops[-1][0])), color))
+        stops.append((1.0, self.secondary_color))
+        return tuple(stops)
+
+    def normalized(self):
+        """Return an equivalent spec in canonical form
+
+        Colors are lowercased and expanded to ``#rrggbb``, stop offsets are
+        fixed up as in color_stops(), and the field that does not apply to
+        the gradient type is reset to its default, so two specs that render
+        identically compare (and hash) equal.
+        """
+        defaults = GradientSpec()
+        spec = self._replace(
+            primary_color=normalize_hex_color(self.primary_color),
+            secondary_color=normalize_hex_color(self.secondary_color),
+            stops=tuple((offset, normalize_hex_color(color)) for offset, color in self.color_stops()[1:-1]),
+            dither=bool(self.dither)
+        )
+        if spec.gradient_type == "linear":
+            return spec._replace(position=defaults.position)
+        return spec._replace(gradient_type="radial", direction=defaults.direction)
+
+
+def parse_hex_color(color):
+    """Parse a ``#rrggbb`` or ``#rgb`` color string into an (r, g, b) tuple"""
+    if not isinstance(color, str) or not color.startswith('#'):
+        raise ValueError(f"Invalid color: {color!r}")
+    digits = color[1:]
+    if len(digits) == 3:
+        # Expand shorthand notation, e.g. #abc -> #aabbcc
+        digits = "".join(c * 2 for c in digits)
+    if len(digits) != 6:
+        raise ValueError(f"Invalid color: {color!r}")
+    try:
+        return int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16)
+    except ValueError:
+        raise ValueError(f"Invalid color: {color!r}") from None
+
+
+def normalize_hex_color(color):
+    """Return a color in canonical lowercase ``#rrggbb`` form"""
+    return "#{:02x}{:02x}{:02x}".format(*parse_hex_color(color))
+
+
+def parse_color_stops(text):
+    """Parse intermediate color stops written CSS style, e.g. ``"#ffcc00 40%, #00aa88 70%"``
+
+    Positions are percentages (``40%``) or fractions (``0.4``). As in CSS,
+    stops without a position are spread evenly between their neighbors,
+    the primary color counting as 0% and the secondary as 100%.
+
+    Returns:
+        Tuple of ``(offset, color)`` pairs for GradientSpec.stops
+    """
+    entries = []
+    for item in text.split(","):
+        parts = item.split()
+        if not parts:
+            continue
+        if len(parts) > 2:
+            raise ValueError(f"Invalid color stop: {item.strip()!r}")
+        color = normalize_hex_color(parts[0])
+        offset = None
+        if len(parts) == 2:
+            position = parts[1]
+            try:
+                offset = float(position[:-1]) / 100 if position.endswith("%") else float(position)
+            except ValueError:
+                raise ValueError(f"Invalid color stop position: {position!r}") from None
+        entries.append([offset, color])
+
+    # Fill in missing positions between the known ones (the ends are 0 and 1)
+    offsets = [0.0] + [offset for offset, _ in entries] + [1.0]
+    index = 1
+    while index < len(offsets) - 1:
+        if offsets[index] is not None:
+            index += 1
+            continue
+        end = index
+        while offsets[end] is None:
+            end += 1
+        start_offset, end_offset = offsets[index - 1], offsets[end]
+        for k in range(index, end):
+            offsets[k] = start_offset + (end_offset - start_offset) * (k - index + 1) / (end - index + 1)
+        index = end
+    return tuple((offsets[i + 1], color) for i, (_, color) in enumerate(entries))
+
+
+def default_filename(spec, width, height, extension="png", variant=False):
+    """Return the conventional output name, e.g. ``c5022f-8ef9e0_lg_1024x1024.png``
+
+    Intermediate stops are listed as ``color@percent`` between the two ends,
+    e.g. ``c5022f-ffcc00@40-8ef9e0_lg_1024x1024.png``, and a non-default
+    interpolation and dithering follow the type, e.g. ``_lg-oklab-dither_``.
+
+    Args:
+        variant: Also name the direction (linear) or position (radial), e.g.
+            ``_lg-left-to-right_``, to tell apart gradients that differ only there
+    """
+    color1 = normalize_hex_color(spec.primary_color)[1:]  # Remove '#'
+    color2 = normalize_hex_color(spec.secondary_color)[1:]
+    middle = "".join(f"{normalize_hex_color(color)[1:]}@{offset * 100:g}-"
+                     for offset, color in spec.color_stops()[1:-1])
+    gradient_type = "lg" if spec.gradient_type == "linear" else "rg"
+    if variant:
+        gradient_type += f"-{spec.direction}" if spec.gradient_type == "linear" else f"-{spec.position}"
+    if spec.interpolation != "srgb":
+        gradient_type += f"-{spec.interpolation}"
+    if spec.dither:
+        gradient_type += "-dither"
+    return f"{color1}-{middle}{color2}_{gradient_type}_{width}x{height}.{extension}"
+
+
+def render_array(spec, width, height, max_memory=DEFAULT_MAX_MEMORY, workers=1,
+                 cancel=None, progress=None, dtype=np.float64, workspace=None, index_field=None):
+    """Render a gradient into a new ``(height, width, 3)`` uint8 array
+
+    Args:
+        spec: GradientSpec describing the gradient
+        width: Image width
+        height: Image height
+        max_memory: Working memory ceiling in bytes, on top of the output
+        workers: Number of threads rendering row bands (None for all cores)
+        cancel: Optional cancellation token (e.g. ``threading.Event``),
+            checked between strips; raises RenderCancelled once set
+        progress: Optional callable receiving ``(rows_done, height)`` after each strip
+        dtype: Floating point type for per-pixel math (see COMPUTE_DTYPES)
+        workspace: Optional Workspace whose scratch buffers are reused
+        index_field: Optional palette index field from ``index_field()`` for
+            this geometry; rendering then only gathers colors
+    """
+    rgb_array = np.empty((height, width, 3), dtype=np.uint8)
+    render_into(spec, rgb_array, max_memory=max_memory, workers=workers, cancel=cancel, progress=progress,
+                dtype=dtype, workspace=workspace, index_field=index_field)
+    return rgb_array
+
+
+def resolve_workers(workers):
+    """Turn a ``workers`` argument into a thread count (None means all cores)"""
+    if workers is None:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def check_output(out):
+    """Raise ValueError unless ``out`` can receive a render (a ``(h, w, 3)`` uint8 array)"""
+    if not isinstance(out, np.ndarray) or out.dtype != np.uint8 or out.ndim != 3 or out.shape[2] != 3:
+        raise ValueError(f"Output must be a (height, width, 3) uint8 array, got "
+                         f"{getattr(out, 'shape', None)} {getattr(out, 'dtype', type(out).__name__)}")
+    if not out.flags.writeable:
+        raise ValueError("Output array is read-only")
+
+
+def check_cancelled(cancel):
+    """Raise RenderCancelled if the cancellation token has been set"""
+    if cancel is not None and cancel.is_set():
+        raise RenderCancelled()
+
+
+def render_into(spec, out, max_memory=DEFAULT_MAX_MEMORY, workers=1, cancel=None, progress=None,
+                dtype=np.float64, workspace=None, index_field=None):
+    """Render a gradient into a preallocated ``(height, width, 3)`` uint8 array
+
+    The image is produced strip by strip, so ``out`` may be an ``np.memmap``
+    to write huge images straight to disk. It may also be a strided view,
+    e.g. the RGB channels of an RGBA frame, and is written in place without
+    intermediate copies. With several workers the strips
+    are rendered concurrently on a thread pool: every per-strip step is a
+    NumPy call that releases the GIL, and strips write disjoint rows of
+    ``out``, so no locking or result copying is needed.
+
+    Args:
+        spec: GradientSpec describing the gradient
+        out: Destination array; its shape defines the image size
+        max_memory: Working memory ceiling in bytes, on top of ``out``,
+            shared between all workers
+        workers: Number of threads rendering row bands (None for all cores)
+        cancel: Optional cancellation token (e.g. ``threading.Event``),
+            checked between strips; raises RenderCancelled once set
+        progress: Optional callable receiving ``(rows_done, height)`` after each strip
+        dtype: Floating point type for per-pixel math (see COMPUTE_DTYPES)
+        workspace: Optional Workspace whose scratch buffers are reused, so
+            repeated renders don't allocate temporaries; only used by
+            single-worker renders, as each pool thread needs its own
+        index_field: Optional palette index field from ``index_field()`` for
+            this geometry; rendering then only gathers colors
+    """
+    check_output(out)
+    height, width = out.shape[:2]
+    plan = RenderPlan(spec, width, height, dtype=dtype, index_field=index_field)
+    return _render_plan_into(plan, out, max_memory, workers, cancel, progress, workspace)
+
+
+def render_region(spec, x0, y0, x1, y1, out_w, out_h, width, height, out=None,
+                  max_memory=DEFAULT_MAX_MEMORY, workers=1, cancel=None, progress=None,
+                  dtype=np.float64, workspace=None):
+    """Render the window ``[x0, x1) x [y0, y1)`` of a gradient at ``out_w x out_h``
+
+    The gradient is a closed-form function of the pixel position, so only the
+    visible window is evaluated, at output resolution: zooming and panning
+    cost O(out_w * out_h) at any zoom level, and deep-zoom tiles can be
+    rendered independently. The window is in pixel coordinates of the full
+    ``width x height`` image and may be fractional or extend past its edges
+    (colors are clamped there). Output pixels sample the window at their
+    centers, so for non-dithered specs the full window at full size matches
+    ``render_array`` exactly. Dithered windows anchor the threshold tile at
+    the window origin without reflecting it about a mirrored center row, so
+    they can differ from ``render_array`` by one level per channel.
+
+    Args:
+        spec: GradientSpec describing the gradient
+        x0, y0, x1, y1: Window in full-image pixel coordinates
+        out_w, out_h: Output size in pixels
+        width, height: Size of the full image the gradient is laid out on
+        out: Optional ``(out_h, out_w, 3)`` uint8 array to render into
+        max_memory, workers, cancel, progress, dtype, workspace: As for ``render_into``
+
+    Returns:
+        The ``(out_h, out_w, 3)`` uint8 array; ValueError is raised for an
+        empty output size or window
+    """
+    if out_w <= 0 or out_h <= 0:
+        raise ValueError(f"Output size must be positive, got {out_w}x{out_h}")
+    if not (x1 > x0 and y1 > y0):
+        raise ValueError(f"Window ({x0}, {y0}, {x1}, {y1}) is empty")
+    if out is None:
+        out = np.empty((out_h, out_w, 3), dtype=np.uint8)
+    else:
+        check_output(out)
+        if out.shape[:2] != (out_h, out_w):
+            raise ValueError(f"Output shape {out.shape} does not match {out_w}x{out_h}")
+    x_coords = _sample_coords(x0, x1, out_w)
+    y_coords = _sample_coords(y0, y1, out_h)
+    plan = RenderPlan(spec, width, height, x_coords=x_coords, y_coords=y_coords, dtype=dtype)
+    return _render_plan_into(plan, out, max_memory, workers, cancel, progress, workspace)
+
+
+def _sample_coords(start, stop, count):
+    """Return the image coordinates sampled by ``count`` pixels spanning [start, stop)"""
+    step = (stop - start) / count
+    return start + (np.arange(count) + 0.5) * step - 0.5
+
+
+def _render_plan_into(plan, out, max_memory, workers, cancel, progress, workspace=None):
+    """Render every row of ``plan`` into ``out`` in strips, optionally on a thread pool"""
+    height = out.shape[0]
+    workers = resolve_workers(workers)
+
+    # Each worker renders its own strip, so they share the memory budget
+    budget = None if max_memory is None else max_memory / workers
+    rows = plan.strip_rows(budget)
+    if workers > 1:
+        # Several strips per worker keep the pool balanced
+        rows = max(1, min(rows, -(-height // (workers * 4))))
+
+    # Rows that mirror already rendered ones (radial gradients centered
+    # vertically) are copied afterwards instead of being rendered
+    mirrored = plan.mirrored_rows()
+    if mirrored is None:
+        rendered = [(0, height)]
+        copies = []
+    else:
+        rendered = [(0, mirrored[0]), (mirrored[1], height)]
+        copies = [(y0, min(mirrored[1], y0 + rows)) for y0 in range(mirrored[0], mirrored[1], rows)]
+    bands = [(y0, min(stop, y0 + rows)) for start, stop in rendered for y0 in range(start, stop, rows)]
+
+    rows_done = 0
+    progress_lock = threading.Lock()
+    if workspace is None or workers > 1:
+        workspace = None
+        # Scratch buffers are reused from strip to strip, one set per thread
+        thread_state = threading.local()
+
+    def render_band(band):
+        nonlocal rows_done
+        y0, y1 = band
+        check_cancelled(cancel)
+        band_workspace = workspace
+        if band_workspace is None:
+            band_workspace = getattr(thread_state, "workspace", None)
+            if band_workspace is None:
+                band_workspace = thread_state.workspace = Workspace()
+        plan.render_rows(y0, y1, out[y0:y1], band_workspace)
+        report(y1 - y0)
+
+    def copy_band(band):
+        y0, y1 = band
+        check_cancelled(cancel)
+        # Row y is identical to row 2 * center - y
+        center = plan.mirror_y
+        out[y0:y1] = out[2 * center - y1 + 1:2 * center - y0 + 1][::-1]
+        report(y1 - y0)
+
+    def report(band_rows):
+        nonlocal rows_done
+        if progress is not None:
+            with progress_lock:
+                rows_done += band_rows
+                progress(rows_done, height)
+
+    if workers == 1 or len(bands) + len(copies) == 1:
+        for band in bands:
+            render_band(band)
+        for band in copies:
+            copy_band(band)
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, len(bands) + len(copies))) as pool:
+            # list() re-raises the first exception from any band; once the
+            # token is set the remaining bands bail out immediately. Copies
+            # start once every source row has been rendered.
+            list(pool.map(render_band, bands))
+            list(pool.map(copy_band, copies))
+    return out
+
+
+def index_field(spec, width, height, max_memory=DEFAULT_MAX_MEMORY, cancel=None, dtype=np.float64):
+    """Compute the palette index of every pixel, or None for copy-only gradients
+
+    The field depends only on the gradient's geometry (type, direction or
+    position, and size), not on its colors, so it can be cached and reused:
+    rendering with it is a single palette gather. Linear gradients return
+    None: they are row or column copies, or one add of two index vectors,
+    which is as cheap as reading a cached field.
+
+    Returns:
+        Read-only ``(height, width)`` uint8 array, or None
+    """
+    plan = RenderPlan(spec, width, height, dtype=dtype)
+    if not plan.uses_index_field:
+        return None
+    field = np.empty((height, width), dtype=np.uint8 if len(plan.palette) <= 256 else np.uint16)
+    workspace = Workspace()
+    rows = plan.strip_rows(max_memory)
+
+    # Rows that mirror others are copied once the rows above are done
+    mirrored = plan.mirrored_rows() or (height, height)
+    for start, stop in ((0, mirrored[0]), (mirrored[1], height)):
+        for y0 in range(start, stop, rows):
+            check_cancelled(cancel)
+            y1 = min(stop, y0 + rows)
+            index = workspace.array("index", (y1 - y0, width), np.intp)
+            plan.index_rows(y0, y1, index, workspace)
+            field[y0:y1] = index
+    if mirrored[0] < mirrored[1]:
+        center = plan.mirror_y
+        field[mirrored[0]:mirrored[1]] = field[2 * center - mirrored[1] + 1:center][::-1]
+
+    field.setflags(write=False)
+    return field
+
+
+def parse_color_pairs(color_pairs):
+    """Turn N color pairs into an ``(N, 2, 3)`` float64 array
+
+    Args:
+        color_pairs: Sequence of ``(primary, secondary)`` hex strings, or an
+            ``(N, 2, 3)`` array-like of RGB values
+    """
+    array = np.asarray(color_pairs)
+    if array.dtype.kind in "USO":
+        if array.ndim != 2 or array.shape[1] != 2:
+            raise ValueError(f"Expected (N, 2) color pairs, got shape {array.shape}")
+        return np.array([[parse_hex_color(c1), parse_hex_color(c2)] for c1, c2 in array], dtype=np.float64)
+    array = array.astype(np.float64)
+    if array.ndim != 3 or array.shape[1:] != (2, 3):
+        raise ValueError(f"Expected (N, 2, 3) RGB color pairs, got shape {array.shape}")
+    return array
+
+
+def _batch_plan(spec, width, height, max_memory, cancel, dtype):
+    """Build the color-independent plan shared by every image of a batch"""
+    field = index_field(spec, width, height, max_memory=max_memory, cancel=cancel, dtype=dtype)
+    return RenderPlan(spec, width, height, dtype=dtype, index_field=field)
+
+
+def render_batch(spec, width, height, color_pairs, out=None, max_memory=DEFAULT_MAX_MEMORY,
+                 workers=1, cancel=None, progress=None, dtype=np.float64):
+    """Render one geometry with N color pairs into an ``(N, height, width, 3)`` array
+
+    The geometry (ratio and index fields) is computed once; each image then
+    costs a palette build and one gather. ``spec`` provides the gradient
+    type, direction and position; its colors are ignored.
+
+    Args:
+        color_pairs: ``(N, 2)`` hex strings or ``(N, 2, 3)`` RGB values
+        out: Optional ``(N, height, width, 3)`` uint8 array (e.g. an np.memmap)
+        progress: Optional callable receiving ``(images_done, N)`` after each image
+        max_memory, workers, cancel, dtype: As for ``render_into``
+    """
+    pairs = parse_color_pairs(color_pairs)
+    if out is None:
+        out = np.empty((len(pairs), height, width, 3), dtype=np.uint8)
+    elif out.shape != (len(pairs), height, width, 3) or out.dtype != np.uint8:
+        raise ValueError(f"Output must be a ({len(pairs)}, {height}, {width}, 3) uint8 array, got {out.shape}")
+    plan = _batch_plan(spec, width, height, max_memory, cancel, dtype)
+    for i, (color1, color2) in enumerate(pairs):
+        _render_plan_into(plan.recolor(color1, color2), out[i], max_memory, workers, cancel, None)
+        if progress is not None:
+            progress(i + 1, len(pairs))
+    return out
+
+
+def iter_batch(spec, width, height, color_pairs, max_memory=DEFAULT_MAX_MEMORY, workers=1,
+               cancel=None, dtype=np.float64):
+    """Yield ``(i, image)`` for each color pair, sharing one geometry
+
+    Streaming counterpart of ``render_batch``: each image is a new
+    ``(height, width, 3)`` uint8 array, so only one frame is alive at a time.
+    """
+    pairs = parse_color_pairs(color_pairs)
+    plan = _batch_plan(spec, width, height, max_memory, cancel, dtype)
+    for i, (color1, color2) in enumerate(pairs):
+        image = np.empty((height, width, 3), dtype=np.uint8)
+        _render_plan_into(plan.recolor(color1, color2), image, max_memory, workers, cancel, None)
+        yield i, image
+
+
+def iter_strips(spec, width, height, max_memory=DEFAULT_MAX_MEMORY, cancel=None, dtype=np.float64, workers=1):
+    """Yield ``(y0, strip)`` pairs covering the image from top to bottom
+
+    Each strip is a new ``(rows, width, 3)`` uint8 array; the number of rows
+    is chosen so that one strip and its temporaries fit in ``max_memory``.
+
+    Args:
+        cancel: Optional cancellation token checked before each strip
+        dtype: Floating point type for per-pixel math (see COMPUTE_DTYPES)
+        workers: Number of threads splitting each strip into bands (None
+            for all cores)
+    """
+    plan = RenderPlan(spec, width, height, dtype=dtype)
+    rows = plan.strip_rows(max_memory, include_output=True)
+    workers = resolve_workers(workers)
+    if workers == 1:
+        workspace = Workspace()
+        for y0 in range(0, height, rows):
+            check_cancelled(cancel)
+            y1 = min(height, y0 + rows)
+            strip = np.empty((y1 - y0, width, 3), dtype=np.uint8)
+            plan.render_rows(y0, y1, strip, workspace)
+            yield y0, strip
+        return
+
+    # One set of scratch buffers per pool thread, reused from strip to strip
+    thread_state = threading.local()
+
+    def render_band(strip, y0, b0, b1):
+        workspace = getattr(thread_state, "workspace", None)
+        if workspace is None:
+            workspace = thread_state.workspace = Workspace()
+        plan.render_rows(y0 + b0, y0 + b1, strip[b0:b1], workspace)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for y0 in range(0, height, rows):
+            check_cancelled(cancel)
+            y1 = min(height, y0 + rows)
+            strip = np.empty((y1 - y0, width, 3), dtype=np.uint8)
+            band = -(-(y1 - y0) // workers)
+            futures = [pool.submit(render_band, strip, y0, b0, min(y1 - y0, b0 + band))
+                       for b0 in range(0, y1 - y0, band)]
+            for future in futures:
+                future.result()
+            yield y0, strip
+
+
+class Workspace:
+    """Scratch buffers reused across strips and renders
+
+    Buffers are looked up by name and dtype and only grow, so rendering
+    same-sized strips again allocates nothing. A workspace must not be used
+    by two renders at the same time.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+
+    @property
+    def nbytes(self):
+        """Total size of the buffers held, in bytes"""
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def array(self, name, shape, dtype):
+        """Return an uninitialized array of ``shape`` backed by the named buffer"""
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape))
+        buffer = self._buffers.get((name, dtype))
+        if buffer is None or buffer.size < size:
+            buffer = self._buffers[(name, dtype)] = np.empty(size, dtype=dtype)
+        return buffer[:size].reshape(shape)
+
+    def clear(self):
+        """Release every buffer"""
+        self._buffers.clear()
+
+
+class RenderPlan:
+    """Per-image precomputation shared by every strip of one render
+
+    Palettes and per-axis indices are computed once in the constructor;
+    ``render_rows`` then fills any band of rows independently, which is what
+    strip, streaming and parallel renderers build on.
+
+    ``width`` and ``height`` are the size the gradient is laid out on. By
+    default every pixel of that image is rendered; ``x_coords`` and
+    ``y_coords`` select other (possibly fractional) sample positions instead,
+    which is how ``render_region`` renders a zoomed or panned window.
+
+    ``dtype`` is the floating point type of the per-pixel math; per-axis
+    precomputation always happens in float64. ``index_field``, a cached
+    result of ``index_field()`` for the same geometry, replaces the
+    per-pixel math with a palette gather.
+
+    With ``spec.dither``, every palette entry is quantized against each of
+    the DITHER_LEVELS thresholds of the Bayer tile, and a pixel picks the
+    variant for its tile position. The tile is anchored at output pixel
+    (0, 0), except that rows are reflected about ``mirror_y`` so mirrored
+    rows can still be copied.
+    """
+
+    def __init__(self, spec, width, height, x_coords=None, y_coords=None, dtype=np.float64, index_field=None):
+        if np.dtype(dtype) not in COMPUTE_DTYPES:
+            raise ValueError(f"Unsupported compute dtype: {dtype}")
+        self.spec = spec
+        self.dtype = np.dtype(dtype)
+        # Column and row a radial gradient is mirror symmetric about, when
+        # rendering the plain pixel grid (see _mirror_axis)
+        self.mirror_x = self.mirror_y = None
+        pixel_grid = (x_coords is None, y_coords is None)
+        self.image_width = width
+        self.image_height = height
+        if x_coords is None:
+            x_coords = np.arange(width)
+        if y_coords is None:
+            y_coords = np.arange(height)
+        # Size of the rendered output
+        self.width = len(x_coords)
+        self.height = len(y_coords)
+
+        self.palette_size = PALETTE_SIZE
+        if spec.gradient_type == "linear":
+            fx, fy = linear_ratio_axes(spec.direction, width, height, x_coords, y_coords)
+            if fy is None:
+                # Horizontal gradient: one row of colors repeated on every line
+                self.kind = "horizontal"
+                self.axis_index = ratio_to_index(fx)
+            elif fx is None:
+                # Vertical gradient: one color per line
+                self.kind = "vertical"
+                self.axis_index = ratio_to_index(fy)
+            else:
+                # Diagonal gradient: fx and fy each cover half of the ratio range, so
+                # with a palette twice as fine the index is an exact integer sum
+                self.kind = "diagonal"
+                steps = 2 * (PALETTE_SIZE - 1)
+                self.palette_size = steps + 1
+                self.x_index = np.rint(fx * steps).astype(np.intp)
+                self.y_index = np.rint(fy * steps).astype(np.intp)
+        else:
+            self.kind = "radial"
+            center_x, center_y = radial_center(spec.position, width, height)
+            self.max_dist = (width**2 + height**2)**0.5 / 2
+            # Squared distances along each axis; a band only adds and takes the root
+            self.dx_squared = ((x_coords - center_x)**2.0).astype(self.dtype)
+            self.dy_squared = ((y_coords - center_y)**2.0).astype(self.dtype)
+            if pixel_grid[0]:
+                self.mirror_x = _mirror_axis(center_x, width)
+            if pixel_grid[1]:
+                self.mirror_y = _mirror_axis(center_y, height)
+
+        self.index_field = None
+        if index_field is not None and self.uses_index_field:
+            if index_field.shape != (self.height, self.width):
+                raise ValueError(f"Index field shape {index_field.shape} does not match "
+                                 f"{self.width}x{self.height}")
+            self.index_field = index_field
+
+        self.dither = bool(spec.dither)
+        if self.dither:
+            # Threshold rank of every column, for each row of the tile. The
+            # dithered palette index of a pixel is index * DITHER_LEVELS + rank.
+            self.dither_ranks = BAYER_TILE[:, np.arange(self.width) % DITHER_TILE_SIZE]
+            if self.kind == "diagonal":
+                # Scaled once here, so a band is a single add
+                self.dither_x_index = self.x_index * DITHER_LEVELS
+                self.dither_y_index = self.y_index * DITHER_LEVELS
+
+        # Everything above is geometry; only the palette depends on the colors
+        self.interpolation = spec.interpolation
+        self.middle_stops = [(offset, parse_hex_color(color)) for offset, color in spec.color_stops()[1:-1]]
+        self._set_colors(parse_hex_color(spec.primary_color), parse_hex_color(spec.secondary_color))
+
+    def _set_colors(self, color1, color2):
+        # The stop list is compiled into a fixed-size ramp once, so extra
+        # stops cost nothing per pixel
+        stops = [(0.0, color1)] + self.middle_stops + [(1.0, color2)]
+        if self.dither:
+            levels = ramp_levels(stops, self.palette_size, self.interpolation)
+            self.palette = quantize_ramp(levels, self.interpolation)
+            self.dither_palette = dither_ramp(levels).reshape(-1, 3)
+            if self.kind == "horizontal":
+                # The tile repeats every DITHER_TILE_SIZE rows
+                self.row_patterns = self.dither_palette[self.axis_index * DITHER_LEVELS + self.dither_ranks]
+            return
+        self.palette = build_ramp(stops, self.palette_size, self.interpolation)
+        if self.kind == "horizontal":
+            self.row_colors = np.take(self.palette, self.axis_index, axis=0, mode='clip')
+        elif self.kind == "vertical":
+            self.column_colors = np.take(self.palette, self.axis_index, axis=0, mode='clip')
+
+    def recolor(self, color1, color2):
+        """Return a plan for the same geometry with other end colors
+
+        Only the palette is rebuilt, so this is cheap however large the
+        image. Intermediate stops are kept.
+
+        Args:
+            color1, color2: (r, g, b) triplets for the primary and secondary color
+        """
+        plan = copy.copy(self)
+        plan._set_colors(color1, color2)
+        return plan
+
+    @property
+    def uses_index_field(self):
+        """Whether a cached ``index_field()`` can speed up this render"""
+        return self.kind == "radial"
+
+    def mirrored_rows(self):
+        """Return the rows ``(y0, y1)`` that copy rows above the center row, or None
+
+        Row ``y`` in that range is identical to row ``2 * mirror_y - y``.
+        """
+        if self.mirror_y is None:
+            return None
+        return self.mirror_y + 1, min(self.height, 2 * self.mirror_y + 1)
+
+    def scratch_bytes_per_pixel(self):
+        """Approximate temporary bytes needed per rendered pixel"""
+        if self.index_field is not None:
+            return 8  # intp copy of the index band made by np.take
+        elif self.kind == "diagonal":
+            return 8  # intp index band
+        elif self.kind == "radial":
+            return self.dtype.itemsize + 8  # distances, intp indices
+        return 0
+
+    def strip_rows(self, max_memory, include_output=False):
+        """Return how many rows fit in ``max_memory`` bytes of working memory
+
+        Copy-only gradients need no scratch memory; they are still split so
+        that each strip writes at most ``max_memory`` bytes of output, which
+        keeps cancellation and progress reporting responsive.
+        """
+        if max_memory is None:
+            return max(1, self.height)
+        scratch = self.scratch_bytes_per_pixel()
+        per_pixel = scratch + 3 if include_output else max(scratch, 3)
+        return max(1, min(self.height, int(max_memory // (per_pixel * max(1, self.width)))))
+
+    def render_rows(self, y0, y1, out, workspace=None):
+        """Render rows ``y0:y1`` into ``out``, a ``(y1 - y0, width, 3)`` uint8 array
+
+        Args:
+            workspace: Optional Workspace to take scratch buffers from
+        """
+        if workspace is None:
+            workspace = Workspace()
+        if self.dither:
+            return self._render_dithered_rows(y0, y1, out, workspace)
+        if self.kind == "horizontal":
+            out[...] = self.row_colors
+        elif self.kind == "vertical":
+            out[:, 0] = self.column_colors[y0:y1]
+            _repeat_first_column(out)
+        elif self.index_field is not None:
+            np.take(self.palette, self.index_field[y0:y1], axis=0, out=out, mode='clip')
+        else:
+            # One gather produces the interleaved RGB output
+            index = workspace.array("index", (y1 - y0, self.width), np.intp)
+            self.index_rows(y0, y1, index, workspace)
+            np.take(self.palette, index, axis=0, out=out, mode='clip')
+        return out
+
+    def tile_rows(self, y0, y1):
+        """Return the row of the dither tile used by each of rows ``y0:y1``"""
+        rows = np.arange(y0, y1)
+        if self.mirror_y is not None:
+            rows = np.abs(rows - self.mirror_y)
+        return rows % DITHER_TILE_SIZE
+
+    def _render_dithered_rows(self, y0, y1, out, workspace):
+        tile_rows = self.tile_rows(y0, y1)
+        if self.kind == "horizontal":
+            for start, stop in self._dither_segments(y0, y1):
+                patterns = self.row_patterns[tile_rows[start - y0:start - y0 + DITHER_TILE_SIZE]]
+                for view, pattern in _tile_views(out[start - y0:stop - y0], patterns):
+                    view[...] = pattern
+        elif self.kind == "vertical":
+            # Fill one tile width, then repeat it across
+            columns = min(DITHER_TILE_SIZE, self.width)
+            index = self.dither_ranks[tile_rows, :columns] + self.axis_index[y0:y1, None] * DITHER_LEVELS
+            out[:, :columns] = self.dither_palette[index]
+            _repeat_first_column(out, columns)
+        else:
+            # Indices are built and gathered chunk by chunk, so the intp
+            # index never leaves the cache and no full-band buffer is needed
+            chunk = max(DITHER_TILE_SIZE, DITHER_CHUNK_BYTES // (8 * max(1, self.width)))
+            for start, stop in self._dither_segments(y0, y1):
+                for c0 in range(start, stop, chunk):
+                    c1 = min(stop, c0 + chunk)
+                    index = workspace.array("dither_index", (c1 - c0, self.width), np.intp)
+                    self._dither_index_rows(c0, c1, index, workspace)
+                    np.take(self.dither_palette, index, axis=0, out=out[c0 - y0:c1 - y0], mode='clip')
+        return out
+
+    def _dither_segments(self, y0, y1):
+        """Split rows ``y0:y1`` at the mirror row, so the tile is periodic within each part"""
+        if self.mirror_y is not None and y0 < self.mirror_y < y1:
+            return [(y0, self.mirror_y), (self.mirror_y, y1)]
+        return [(y0, y1)]
+
+    def _dither_index_rows(self, y0, y1, index, workspace):
+        # Palette index scaled by DITHER_LEVELS ...
+        if self.index_field is not None:
+            np.multiply(self.index_field[y0:y1], DITHER_LEVELS, out=index, dtype=np.intp)
+        elif self.kind == "diagonal":
+            np.add(self.dither_y_index[y0:y1, None], self.dither_x_index[None, :], out=index)
+        else:
+            self.index_rows(y0, y1, index, workspace)
+            index *= DITHER_LEVELS
+        # ... plus the threshold rank (rows y0:y1 never cross the mirror row,
+        # so the tile is periodic)
+        ranks = self.dither_ranks[self.tile_rows(y0, min(y1, y0 + DITHER_TILE_SIZE))]
+        for view, pattern in _tile_views(index, ranks):
+            view += pattern
+        return index
+
+    def index_rows(self, y0, y1, index, workspace):
+        """Write the palette indices of rows ``y0:y1`` into the intp array ``index``"""
+        if self.kind == "diagonal":
+            np.add(self.y_index[y0:y1, None], self.x_index[None, :], out=index)
+        else:
+            self._radial_index_rows(y0, y1, index, workspace)
+        return index
+
+    def _radial_index_rows(self, y0, y1, index, workspace):
+        # With a center column, only columns up to it are computed; the
+        # rest are mirrored at the index level
+        columns = self.width if self.mirror_x is None else self.mirror_x + 1
+        ratio = workspace.array("ratio", (y1 - y0, columns), self.dtype)
+
+        # Calculate distances from center, then turn them into palette indices,
+        # all in place in the workspace buffers
+        np.add(self.dy_squared[y0:y1, None], self.dx_squared[None, :columns], out=ratio)
+        np.sqrt(ratio, out=ratio)
+        ratio /= self.max_dist
+        np.minimum(ratio, 1.0, out=ratio)
+        ratio *= PALETTE_SIZE - 1
+        np.rint(ratio, out=ratio)
+        np.copyto(index[:, :columns], ratio, casting='unsafe')
+        if columns < self.width:
+            # Column x is identical to column 2 * center - x
+            count = self.width - columns
+            index[:, columns:] = index[:, columns - 1 - count:columns - 1][:, ::-1]
+
+
+def _mirror_axis(center, size):
+    """Return the pixel a radial gradient is mirrored about along one axis, or None
+
+    Pixels ``center + d`` and ``center - d`` are equidistant from an integer
+    center, so when every pixel past the center has a mirror image before
+    it, only the first half needs rendering.
+    """
+    if center == int(center) and center < size - 1 and 2 * center >= size - 1:
+        return int(center)
+    return None
+
+
+def linear_ratio_axes(direction, width, height, x_coords=None, y_coords=None):
+    """Split a linear gradient's ratio into a column part and a row part
+
+    Every supported direction is separable: ``ratio[y, x] == fx[x] + fy[y]``.
+    Either part is None when the gradient does not vary along that axis.
+
+    Args:
+        x_coords, y_coords: Sample positions in image pixels (default: every pixel)
+
+    Returns:
+        (fx, fy): float64 arrays matching ``x_coords`` and ``y_coords`` (or None)
+    """
+    if x_coords is None:
+        x_coords = np.arange(width)
+    if y_coords is None:
+        y_coords = np.arange(height)
+
+    if direction == "left-to-right":
+        return x_coords / width, None
+    elif direction == "right-to-left":
+        return 1 - (x_coords / width), None
+    elif direction == "top-to-bottom":
+        return None, y_coords / height
+    elif direction == "bottom-to-top":
+        return None, 1 - (y_coords / height)
+    elif direction == "top-right-to-bottom-left":
+        return (width - x_coords) / width / 2, y_coords / height / 2
+    elif direction == "bottom-left-to-top-right":
+        return x_coords / width / 2, (height - y_coords) / height / 2
+    elif direction == "bottom-right-to-top-left":
+        return (width - x_coords) / width / 2, (height - y_coords) / height / 2
+    else:  # top-left-to-bottom-right, also the default
+        return x_coords / width / 2, y_coords / height / 2
+
+
+def build_palette(color1, color2, size=PALETTE_SIZE):
+    """Precompute ``size`` evenly spaced blends from color1 to color2
+
+    Returns:
+        ``(size, 3)`` uint8 array; entry ``i`` is the color at ratio ``i / (size - 1)``
+    """
+    ratio = np.linspace(0.0, 1.0, size)[:, None]
+    return (color1 * (1 - ratio) + color2 * ratio).astype(np.uint8)
+
+
+def linear_to_srgb(linear):
+    """Gamma-encode linear-light values in [0, 1] to sRGB levels in [0, 255] (as floats)"""
+    linear = np.clip(linear, 0.0, 1.0)
+    return 255 * np.where(linear <= 0.0031308, linear * 12.92, 1.055 * np.power(linear, 1 / 2.4) - 0.055)
+
+
+def srgb_to_oklab(colors):
+    """Convert ``(..., 3)`` sRGB byte values to OKLab"""
+    linear = SRGB_TO_LINEAR[np.asarray(colors, dtype=np.intp)]
+    return np.cbrt(linear @ _LINEAR_TO_LMS.T) @ _LMS_TO_OKLAB.T
+
+
+def oklab_to_srgb(lab):
+    """Convert ``(..., 3)`` OKLab values to sRGB levels in [0, 255] (as floats)
+
+    Colors outside the sRGB gamut are clipped per channel.
+    """
+    return linear_to_srgb((lab @ _OKLAB_TO_LMS.T) ** 3 @ _LMS_TO_LINEAR.T)
+
+
+def build_ramp(stops, size=PALETTE_SIZE, interpolation="srgb"):
+    """Precompute ``size`` evenly spaced colors along a list of color stops
+
+    Between two stops colors blend linearly in the ``interpolation`` color
+    space. In the default "srgb" space this matches build_palette bit for
+    bit for a two-stop gradient. Stops at the same offset make a hard edge.
+
+    Args:
+        stops: Sequence of ``(offset, (r, g, b))`` with non-decreasing
+            offsets, the first at 0.0 and the last at 1.0
+        interpolation: One of INTERPOLATION_MODES
+
+    Returns:
+        ``(size, 3)`` uint8 array; entry ``i`` is the color at ratio ``i / (size - 1)``
+    """
+    if interpolation == "srgb" and len(stops) == 2:
+        return build_palette(np.asarray(stops[0][1], dtype=np.float64),
+                             np.asarray(stops[1][1], dtype=np.float64), size)
+    return quantize_ramp(ramp_levels(stops, size, interpolation), interpolation)
+
+
+def ramp_levels(stops, size=PALETTE_SIZE, interpolation="srgb"):
+    """Like build_ramp, but return the exact ``(size, 3)`` float64 sRGB levels before quantizing"""
+    if interpolation not in INTERPOLATION_MODES:
+        raise ValueError(f"Unsupported interpolation: {interpolation!r}")
+    offsets = np.array([offset for offset, _ in stops], dtype=np.float64)
+    colors = np.array([color for _, color in stops], dtype=np.float64)
+    if interpolation == "srgb":
+        return _blend_stops(offsets, colors, size)
+    # Blend in the other space and convert only the ramp back
+    if interpolation == "srgb-linear":
+        return linear_to_srgb(_blend_stops(offsets, SRGB_TO_LINEAR[colors.astype(np.intp)], size))
+    return oklab_to_srgb(_blend_stops(offsets, srgb_to_oklab(colors), size))
+
+
+def quantize_ramp(levels, interpolation="srgb"):
+    """Turn ramp_levels() output into a uint8 palette"""
+    if interpolation == "srgb":
+        # Truncate, as the original renderer did
+        return levels.astype(np.uint8)
+    # Round rather than truncate so the end colors survive the round trip
+    return np.clip(np.rint(levels), 0, 255).astype(np.uint8)
+
+
+def _blend_stops(offsets, colors, size):
+    """Return ``(size, channels)`` piecewise-linear blends of ``colors`` placed at ``offsets``"""
+    ratio = np.linspace(0.0, 1.0, size)
+    # Segment each ratio falls in; at a hard edge the later segment wins
+    segment = np.clip(np.searchsorted(offsets, ratio, side="right") - 1, 0, len(offsets) - 2)
+    start = offsets[segment]
+    span = offsets[segment + 1] - start
+    local = np.divide(ratio - start, span, out=np.ones_like(ratio), where=span > 0)
+    np.clip(local, 0.0, 1.0, out=local)
+    local = local[:, None]
+    return colors[segment] * (1 - local) + colors[segment + 1] * local
+
+
+def bayer_matrix(size):
+    """Return the ``(size, size)`` Bayer ordered-dither matrix; ``size`` is a power of two
+
+    Entries are the ranks 0 to ``size**2 - 1``, arranged so that every
+    threshold level is spread as evenly as possible over the tile.
+    """
+    matrix = np.zeros((1, 1), dtype=np.intp)
+    while len(matrix) < size:
+        matrix = np.block([[4 * matrix, 4 * matrix + 2],
+                           [4 * matrix + 3, 4 * matrix + 1]])
+    return matrix
+
+
+# Precomputed threshold tile used by every dithered render, and the
+# threshold each rank in it stands for
+BAYER_TILE = bayer_matrix(DITHER_TILE_SIZE)
+BAYER_TILE.flags.writeable = False
+DITHER_THRESHOLDS = (np.arange(DITHER_LEVELS) + 0.5) / DITHER_LEVELS
+
+
+def dither_ramp(levels):
+    """Quantize float ramp levels once per threshold of the Bayer tile
+
+    Variant ``k`` of an entry rounds its level up when the fraction exceeds
+    ``1 - (k + 0.5) / DITHER_LEVELS``, so averaged over the tile every
+    entry reproduces its exact level. The variants of one entry are stored
+    next to each other: neighboring pixels mostly share an entry, so their
+    gathers hit the same cache lines.
+
+    Returns:
+        ``(size, DITHER_LEVELS, 3)`` uint8 array
+    """
+    dithered = levels[:, None] + DITHER_THRESHOLDS[None, :, None]
+    # Levels are never negative, so truncating is flooring
+    np.minimum(dithered, 255, out=dithered)
+    return dithered.astype(np.uint8)
+
+
+def ratio_to_index(ratio, size=PALETTE_SIZE):
+    """Quantize ratios in [0, 1] to the nearest palette index"""
+    return np.rint(ratio * (size - 1)).astype(np.intp)
+
+
+def _tile_views(band, pattern):
+    """Pair views of ``band`` with ``pattern``, a tile's worth of rows repeated down it
+
+    Whole tiles come as one ``(tiles, DITHER_TILE_SIZE, ...)`` view, so a
+    single broadcast operation covers them; leftover rows come last.
+    """
+    rows = band.shape[0]
+    whole = rows - rows % DITHER_TILE_SIZE
+    views = []
+    if whole:
+        views.append((band[:whole].reshape(-1, DITHER_TILE_SIZE, *band.shape[1:]), pattern))
+    if whole < rows:
+        views.append((band[whole:], pattern[:rows - whole]))
+    return views
+
+
+def _repeat_first_column(out, period=1):
+    """Copy column 0 of ``out`` (or the first ``period`` columns) across every column
+
+    Broadcasting a column with a zero stride is slow, so the filled part is
+    doubled instead: each step is one strided block copy.
+    """
+    width = out.shape[1]
+    filled = period
+    while filled < width:
+        count = min(filled, width - filled)
+        out[:, filled:filled + count] = out[:, :count]
+        filled += count
+
+
+def radial_center(position, width, height):
+    """Return the (x, y) center point of a radial gradient for a position name"""
+    if position == "top":
+        return width // 2, 0
+    elif position == "top-right":
+        return width, 0
+    elif position == "right":
+        return width, height // 2
+    elif position == "bottom-right":
+        return width, height
+    elif position == "bottom":
+        return width // 2, height
+    elif position == "bottom-left":
+        return 0, height
+    elif position == "left":
+        return 0, height // 2
+    elif position == "top-left":
+        return 0, 0
+    else:  # Default to center
+        return width // 2, height // 2
+
+
+def render(spec, width, height, workers=1, cancel=None, progress=None, dtype=np.float64):
+    """Render a gradient as a PIL RGB image
+
+    Args:
+        spec: GradientSpec describing the gradient
+        width: Image width
+        height: Image height
+        workers: Number of threads rendering row bands (None for all cores)
+        cancel: Optional cancellation token checked between strips
+        progress: Optional callable receiving ``(rows_done, height)`` after each strip
+        dtype: Floating point type for per-pixel math (see COMPUTE_DTYPES)
+    """
+    array = render_array(spec, width, height, workers=workers, cancel=cancel, progress=progress, dtype=dtype)
+    return Image.fromarray(array)
@@ -0,0 +1,381 @@
+"""Streaming export of gradients to image files.
+
+Nothing here needs a fully materialized frame: rows come from the engine's
+strip renderer and are compressed and written as they arrive. Like the
+engine, this module does not import tkinter.
+"""
+import itertools
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from gradient_engine import RenderCancelled, check_cancelled, iter_strips, render_array, render_into
+from gradient_profile import profiler
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Uncompressed formats rendered straight into a memory-mapped file:
+#   npy - NumPy array file; np.load(path, mmap_mode="r") maps it back
+#   rgb - headerless interleaved 8-bit RGB rows (ffmpeg's rawvideo rgb24)
+RAW_FORMATS = ("npy", "rgb")
+
+# Image formats the export worker can write
+EXPORT_FORMATS = ("png", "jpg") + RAW_FORMATS
+
+# JPEG quality used by every exporter
+JPEG_QUALITY = 95
+
+# Working memory per strip for streaming exports. Rendering and compression
+# overlap, so up to three strips (rendering, queued, compressing) are alive.
+STREAM_MAX_MEMORY = 16 * 1024 * 1024
+
+
+def _write_chunk(file, chunk_type, data):
+    """Write one PNG chunk (length, type, data, CRC)"""
+    file.write(struct.pack(">I", len(data)))
+    file.write(chunk_type)
+    file.write(data)
+    file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type)) & 0xFFFFFFFF))
+
+
+def _filter_up(strip, previous_row):
+    """Apply PNG filter type 2 ("Up") to a strip and prefix each row with its filter byte
+
+    Gradients change slowly from row to row, so the differences are tiny
+    (often all zero) and compress far better than the raw rows.
+    """
+    rows, width = strip.shape[:2]
+    filtered = np.empty((rows, 1 + width * 3), dtype=np.uint8)
+    filtered[:, 0] = 2
+    flat = strip.reshape(rows, width * 3)
+    if previous_row is None:
+        # The row above the first image row is defined as all zeros
+        filtered[0, 1:] = flat[0]
+    else:
+        np.subtract(flat[0], previous_row, out=filtered[0, 1:])
+    np.subtract(flat[1:], flat[:-1], out=filtered[1:, 1:])
+    return filtered, flat[-1].copy()
+
+
+def write_png(file_path, width, height, strips, compress_level=6, progress=None):
+    """Write an 8-bit RGB PNG from an iterable of ``(y0, strip)`` pairs
+
+    Strips must arrive in order and cover all ``height`` rows. Each one is
+    filtered, compressed and written before the next is requested.
+
+    Args:
+        file_path: Destination path
+        width: Image width
+        height: Image height
+        strips: Iterable of ``(y0, (rows, width, 3) uint8 array)`` pairs
+        compress_level: zlib level, 0 (none) to 9 (smallest)
+        progress: Optional callable receiving the number of rows written so far
+    """
+    compressor = zlib.compressobj(compress_level)
+    previous_row = None
+    rows_written = 0
+    try:
+        with open(file_path, "wb") as file:
+            file.write(PNG_SIGNATURE)
+            _write_chunk(file, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+            for y0, strip in strips:
+                if y0 != rows_written or strip.shape[1:] != (width, 3):
+                    raise ValueError(f"Unexpected strip at row {y0} with shape {strip.shape}")
+                filtered, previous_row = _filter_up(strip, previous_row)
+                data = compressor.compress(filtered)
+                if data:
+                    _write_chunk(file, b"IDAT", data)
+                rows_written += strip.shape[0]
+                if progress is not None:
+                    progress(rows_written)
+
+            if rows_written != height:
+                raise ValueError(f"Expected {height} rows, got {rows_written}")
+            _write_chunk(file, b"IDAT", compressor.flush())
+            _write_chunk(file, b"IEND", b"")
+    except BaseException:
+        # Never leave a truncated PNG behind
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+        raise
+
+
+def _prefetch(iterable, depth=1):
+    """Run an iterator on a background thread, buffering up to ``depth`` items
+
+    NumPy releases the GIL while rendering and zlib releases it while
+    compressing, so the producer and the consumer genuinely overlap.
+    """
+    items = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def put(entry):
+        # Poll so an abandoned consumer can't leave this thread blocked forever
+        while not stop.is_set():
+            try:
+                items.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((done, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def save_png_streaming(spec, width, height, file_path, compress_level=6,
+                       max_memory=STREAM_MAX_MEMORY, progress=None, cancel=None, workers=1):
+    """Render a gradient and write it as PNG without materializing the full frame
+
+    Strips are generated on a background thread while the previous strip is
+    compressed and written, so encoding starts with the first rows.
+
+    Args:
+        spec: GradientSpec describing the gradient
+        width: Image width
+        height: Image height
+        file_path: Destination path
+        compress_level: zlib level, 0 (none) to 9 (smallest)
+        max_memory: Working memory ceiling per strip, in bytes
+        progress: Optional callable receiving the number of rows written so far
+        cancel: Optional cancellation token checked before each strip; the
+            partial file is removed and RenderCancelled is raised once set
+        workers: Number of threads rendering each strip (None for all cores)
+    """
+    strips = _prefetch(iter_strips(spec, width, height, max_memory=max_memory, cancel=cancel, workers=workers))
+    write_png(file_path, width, height, strips, compress_level=compress_level, progress=progress)
+
+
+def _remove_partial(file_path):
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+
+def open_raw_output(file_path, width, height, file_format=None):
+    """Create a file and return a writable ``(height, width, 3)`` uint8 memmap of it
+
+    Pass the result to ``render_into`` (or any NumPy code) to fill the file
+    in place; pages are written back by the OS, so the image never has to
+    fit in memory.
+
+    Args:
+        file_format: "npy" or "rgb"; guessed from the extension by default
+            (anything other than ``.npy`` is raw RGB)
+    """
+    if file_format is None:
+        file_format = "npy" if file_path.lower().endswith(".npy") else "rgb"
+    shape = (height, width, 3)
+    if file_format == "npy":
+        return np.lib.format.open_memmap(file_path, mode="w+", dtype=np.uint8, shape=shape)
+    elif file_format == "rgb":
+        return np.memmap(file_path, dtype=np.uint8, mode="w+", shape=shape)
+    raise ValueError(f"Unsupported raw format: {file_format}")
+
+
+def save_raw(spec, width, height, file_path, file_format=None, workers=1, progress=None, cancel=None):
+    """Render a gradient straight into a memory-mapped ``.npy`` or raw ``.rgb`` file
+
+    No frame is allocated in memory and nothing is encoded, so this is the
+    fastest way to hand huge renders to other processes.
+
+    Args:
+        file_format: "npy" or "rgb"; guessed from the extension by default
+        workers: Number of threads rendering row bands (None for all cores)
+        progress: Optional callable receiving the number of rows written so far
+        cancel: Optional cancellation token; the partial file is removed and
+            RenderCancelled is raised once set
+
+    Returns:
+        The flushed memmap, still open for reading and writing
+    """
+    output = open_raw_output(file_path, width, height, file_format)
+    try:
+        render_into(spec, output, workers=workers, cancel=cancel,
+                    progress=None if progress is None else lambda rows, total: progress(rows))
+        output.flush()
+    except BaseException:
+        del output
+        _remove_partial(file_path)
+        raise
+    return output
+
+
+def save_jpg(spec, width, height, file_path, image=None, progress=None, cancel=None, workers=1):
+    """Render (unless ``image`` is given) and write a gradient as JPEG
+
+    JPEG needs the whole frame, so the render happens first (reporting
+    0-80%) and the encode afterwards.
+
+    Args:
+        image: Optional already rendered PIL image to encode instead
+        progress: Optional callable receiving a completion fraction in [0, 1]
+        cancel: Optional cancellation token; raises RenderCancelled once set
+        workers: Number of threads rendering row bands (None for all cores)
+    """
+    def report(fraction):
+        if progress is not None:
+            progress(fraction)
+
+    if image is None:
+        array = render_array(spec, width, height, workers=workers, cancel=cancel,
+                             progress=lambda rows, total: report(0.8 * rows / total))
+        image = Image.fromarray(array)
+    elif image.mode != "RGB":
+        image = image.convert("RGB")
+    check_cancelled(cancel)
+    report(0.8)
+    try:
+        image.save(file_path, "JPEG", quality=JPEG_QUALITY)
+    except BaseException:
+        _remove_partial(file_path)
+        raise
+    report(1.0)
+
+
+class ExportJob:
+    """One export handled by ExportWorker"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, spec, width, height, file_path, image_format, image=None, workers=1):
+        self.id = next(self._ids)
+        self.spec = spec
+        self.width = width
+        self.height = height
+        self.file_path = file_path
+        self.image_format = image_format
+        self.image = image
+        self.workers = workers
+        self.cancel_event = threading.Event()
+        self.submitted_at = time.perf_counter()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+
+class ExportWorker:
+    """Encodes and writes exports on a thread pool, off the UI thread
+
+    Several jobs run at the same time. Progress and results are posted to
+    ``events`` as ``(kind, job, value)`` tuples, where kind is one of:
+
+        "progress"  - value is the completion percentage (int)
+        "done"      - value is None
+        "cancelled" - value is None
+        "error"     - value is the exception
+
+    ``notify``, if given, is called (from the worker thread) after each
+    event is posted, so a UI can wake up instead of polling the queue.
+    ``render_workers`` is the number of threads each job renders with
+    (None for all cores).
+    """
+
+    def __init__(self, events=None, max_workers=4, notify=None, render_workers=1):
+        self.events = events if events is not None else queue.Queue()
+        self.notify = notify
+        self.render_workers = render_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="export")
+        self._active = set()
+        self._lock = threading.Lock()
+
+    def submit(self, spec, width, height, file_path, image_format, image=None):
+        """Queue an export and return its ExportJob
+
+        Args:
+            image_format: One of EXPORT_FORMATS
+            image: Optional rendered PIL image (JPEG only); other formats render from the engine
+        """
+        if image_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported format: {image_format}")
+        job = ExportJob(spec, width, height, file_path, image_format, image, workers=self.render_workers)
+        with self._lock:
+            self._active.add(job)
+        self._pool.submit(profiler.wrap(self._run), job)
+        return job
+
+    def active_jobs(self):
+        """Return the jobs that are queued or running"""
+        with self._lock:
+            return list(self._active)
+
+    def cancel_all(self):
+        for job in self.active_jobs():
+            job.cancel()
+
+    def shutdown(self, wait=False):
+        self.cancel_all()
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, job):
+        last_percent = [-1]
+
+        def report(fraction):
+            percent = int(100 * fraction)
+            if percent != last_percent[0]:
+                last_percent[0] = percent
+                self._post(("progress", job, percent))
+
+        profiler.record_wait("export.queue", time.perf_counter() - job.submitted_at)
+        try:
+            check_cancelled(job.cancel_event)
+            with profiler.stage(f"export.{job.image_format}", width=job.width, height=job.height):
+                self._export(job, report)
+            result = ("done", job, None)
+        except RenderCancelled:
+            result = ("cancelled", job, None)
+        except Exception as e:
+            result = ("error", job, e)
+        finally:
+            job.image = None  # Don't keep the frame alive once encoded
+            with self._lock:
+                self._active.discard(job)
+        self._post(result)
+
+    def _export(self, job, report):
+        """Render and write one job's file"""
+        if job.image_format == "png":
+            save_png_streaming(job.spec, job.width, job.height, job.file_path, cancel=job.cancel_event,
+                               progress=lambda rows: report(rows / job.height), workers=job.workers)
+        elif job.image_format in RAW_FORMATS:
+            save_raw(job.spec, job.width, job.height, job.file_path, job.image_format, workers=job.workers,
+                     progress=lambda rows: report(rows / job.height), cancel=job.cancel_event)
+        else:
+            save_jpg(job.spec, job.width, job.height, job.file_path, image=job.image,
+                     progress=report, cancel=job.cancel_event, workers=job.workers)
+
+    def _post(self, event):
+        self.events.put(event)
+        if self.notify is not None:
+            self.notify()
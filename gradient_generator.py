@@ -2,10 +2,12 @@ import tkinter as tk
 from tkinter import ttk, colorchooser, filedialog
 from PIL import Image, ImageDraw, ImageTk
 LANCZOS: int
+BILINEAR: int
 try:
     # For newer Pillow versions (9.0.0 and above)
     from PIL.Image import Resampling
     LANCZOS = Resampling.LANCZOS
+    BILINEAR = Resampling.BILINEAR
 except ImportError:
     # For older Pillow versions
     import warnings
@@ -15,12 +17,70 @@ except ImportError:
         stacklevel=2
     )
     LANCZOS = Image.LANCZOS  # type: ignore
-import colorsys
+    BILINEAR = Image.BILINEAR  # type: ignore
 import random
-import numpy as np
 import threading
 import queue
 import time
+import os
+import argparse
+
+from gradient_cache import GeometryCache, RenderCache, max_disk_bytes_from_env
+from gradient_engine import (GradientSpec, INTERPOLATION_MODES, LINEAR_DIRECTIONS, RADIAL_POSITIONS,
+                             RenderCancelled, default_filename, parse_color_stops,
+                             render_array, render_region)
+from gradient_export import ExportWorker
+from gradient_profile import configure_from_env, profiler
+
+# Coarse-to-fine preview stages: (fraction of the preview size, progress %).
+# Each stage is rendered and upscaled immediately, so the first pixels show
+# up after a render of only a few hundred pixels.
+PREVIEW_STAGES = ((1 / 16, 2), (1 / 4, 5))
+
+# Virtual event that worker threads generate to wake the Tk thread when
+# they have queued something, instead of the UI polling the queues
+QUEUE_EVENT = "<<GradientQueueUpdated>>"
+
+# Quiet period before an interactive edit (typing, dragging, resizing)
+# triggers a render
+RENDER_DEBOUNCE_MS = 120
+
+# Shorter quiet period while dragging the zoomed preview around
+PAN_DEBOUNCE_MS = 15
+
+# Largest preview zoom. Zoomed-in previews only render the visible window,
+# so the cost does not grow with the zoom level.
+MAX_ZOOM = 8.0
+
+class DebouncedCall:
+    """Run a callback on the Tk thread once requests stop arriving
+    
+    Every request() restarts the delay, so a burst of requests collapses
+    into a single call made after the last one.
+    """
+    def __init__(self, root, callback, delay_ms):
+        self.root = root
+        self.callback = callback
+        self.delay_ms = delay_ms
+        self._after_id = None
+    
+    @property
+    def pending(self):
+        return self._after_id is not None
+    
+    def request(self, delay_ms=None):
+        """Schedule the callback, replacing any call that hasn't run yet"""
+        self.cancel()
+        self._after_id = self.root.after(self.delay_ms if delay_ms is None else delay_ms, self._fire)
+    
+    def cancel(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+    
+    def _fire(self):
+        self._after_id = None
+        self.callback()
 
 class GradientImageGenerator:
     def __init__(self, root):
@@ -55,9 +115,12 @@ class GradientImageGenerator:
         # Default values
         self.primary_color = "#c5022f"
         self.secondary_color = "#8ef9e0"
+        self.stops = ()  # Color stops between the primary and secondary color
         self.gradient_type = "linear"
         self.direction = "top-left-to-bottom-right"
         self.position = "center"  # Default position for radial gradient
+        self.interpolation = "srgb"
+        self.dither = False
         self.width = 1024
         self.height = 1024
         self.aspect_ratio = "1:1"  # Default aspect ratio
@@ -66,27 +129,68 @@ class GradientImageGenerator:
         self.preview_max_width = 400
         self.preview_max_height = 400
         self.zoom_factor = 1.0  # Default zoom factor for preview
+        self.view_center = (0.5, 0.5)  # Center of the zoomed-in view, as a fraction of the image
+        self._pan_anchor = None  # Pointer position and view center when a drag started
         
         # For asynchronous image generation
         self.image_queue = queue.Queue()
         self.preview_queue = queue.Queue()
         self.is_generating = False
         self.generation_thread = None
-        self.gradient_image = None
+        self.preview_image = None  # PIL image currently shown in the preview
         self.progress_value = 0
         
+        # Every generation gets an id and a cancellation token. Starting a new
+        # one sets the previous token, and queue items from older generations
+        # are dropped, so a new request never waits for a stale render.
+        self.generation_id = 0
+        self.cancel_event = threading.Event()
+        self.generating_params = None  # Parameters of the render in flight
+        self.image_params = None  # Parameters of self.preview_image
+        
+        # PNG/JPG encoding runs on export worker threads; their progress and
+        # results come back through export_queue
+        self.export_queue = queue.Queue()
+        # Full-size images are only rendered by exports, which use every core
+        self.export_worker = ExportWorker(events=self.export_queue, notify=self._wake_ui, render_workers=None)
+        
+        # At most one wake-up event is pending at a time; check_queue drains
+        # everything that arrived before it runs
+        self._wake_lock = threading.Lock()
+        self._wake_pending = False
+        self._wake_requested_at = None
+        
         # Store references to PhotoImage objects to prevent garbage collection
         self.photo_images = []
         
+        # Cache of previous renders, so toggling between settings or zoom
+        # levels is instant. Set GRADIENT_CACHE_DIR to keep finished previews
+        # on disk across sessions (limited by GRADIENT_CACHE_MAX_BYTES);
+        # they are written on a background thread so previews don't wait
+        self.render_cache = RenderCache(disk_dir=os.environ.get("GRADIENT_CACHE_DIR") or None,
+                                        max_disk_bytes=max_disk_bytes_from_env(),
+                                        background_writes=True)
+        
+        # Index fields depend only on the geometry, so a color change (e.g.
+        # browsing random colors) only re-gathers colors over a cached field
+        self.geometry_cache = GeometryCache()
+        
+        # Interactive edits go through a debounced scheduler so a burst of
+        # events results in a single render of the latest state
+        self.render_scheduler = DebouncedCall(self.root, self.update_preview, RENDER_DEBOUNCE_MS)
+        
         self.create_widgets()
+        
+        # Worker threads wake the queue checker through a virtual event. Bind
+        # it before the first preview starts: an event generated with no
+        # binding is dropped, and the pending flag would block every later wake
+        self.root.bind(QUEUE_EVENT, self.check_queue)
+        
         self.update_preview()
         
         # Bind window resize event to update preview
         self.root.bind("<Configure>", self._on_window_resize)
         
-        # Start the queue checker
-        self.check_queue()
-        
     def create_widgets(self):
         # Main frame
         main_frame = ttk.Frame(self.root, padding=10)
@@ -138,10 +242,16 @@ class GradientImageGenerator:
         self.secondary_preview.pack(side=tk.LEFT, padx=5)
         self._update_secondary_preview(self.secondary_color)
         
+        # Intermediate color stops, written CSS style: "#ffcc00 40%, #00aa88 70%"
+        ttk.Label(control_frame, text="Color Stops").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.stops_entry = ttk.Entry(control_frame, width=40)
+        self.stops_entry.grid(row=2, column=1, sticky=tk.W, pady=5)
+        self.stops_entry.bind("<KeyRelease>", lambda event: self.schedule_preview())
+        
         # Gradient Type
-        ttk.Label(control_frame, text="Gradient Type").grid(row=2, column=0, sticky=tk.W, pady=5)
+        ttk.Label(control_frame, text="Gradient Type").grid(row=3, column=0, sticky=tk.W, pady=5)
         gradient_frame = ttk.Frame(control_frame)
-        gradient_frame.grid(row=2, column=1, sticky=tk.W, pady=5)
+        gradient_frame.grid(row=3, column=1, sticky=tk.W, pady=5)
         
         self.gradient_var = tk.StringVar(value=self.gradient_type)
         ttk.Radiobutton(gradient_frame, 
@@ -157,48 +267,43 @@ class GradientImageGenerator:
         
         # Direction (for linear gradient)
         self.direction_label = ttk.Label(control_frame, text="Direction")
-        self.direction_label.grid(row=3, column=0, sticky=tk.W, pady=5)
+        self.direction_label.grid(row=4, column=0, sticky=tk.W, pady=5)
         self.direction_var = tk.StringVar(value=self.direction)
         self.direction_combo = ttk.Combobox(control_frame, textvariable=self.direction_var, state="readonly")
-        self.direction_combo['values'] = (
-            "left-to-right",
-            "right-to-left",
-            "top-to-bottom",
-            "bottom-to-top",
-            "top-left-to-bottom-right",
-            "top-right-to-bottom-left",
-            "bottom-left-to-top-right",
-            "bottom-right-to-top-left"
-        )
-        self.direction_combo.grid(row=3, column=1, sticky=tk.W, pady=5)
+        self.direction_combo['values'] = LINEAR_DIRECTIONS
+        self.direction_combo.grid(row=4, column=1, sticky=tk.W, pady=5)
         self.direction_combo.bind("<<ComboboxSelected>>", lambda e: self.update_preview())
         
         # Position (for radial gradient)
         self.position_label = ttk.Label(control_frame, text="Position")
-        self.position_label.grid(row=4, column=0, sticky=tk.W, pady=5)
+        self.position_label.grid(row=5, column=0, sticky=tk.W, pady=5)
         self.position_var = tk.StringVar(value=self.position)
         self.position_combo = ttk.Combobox(control_frame, textvariable=self.position_var, state="readonly")
-        self.position_combo['values'] = (
-            "center",
-            "top",
-            "top-right",
-            "right",
-            "bottom-right",
-            "bottom",
-            "bottom-left",
-            "left",
-            "top-left"
-        )
-        self.position_combo.grid(row=4, column=1, sticky=tk.W, pady=5)
+        self.position_combo['values'] = RADIAL_POSITIONS
+        self.position_combo.grid(row=5, column=1, sticky=tk.W, pady=5)
         self.position_combo.bind("<<ComboboxSelected>>", lambda e: self.update_preview())
         
         # Show/hide direction and position based on gradient type
         self._toggle_controls()
         
+        # Color space the colors are blended in
+        ttk.Label(control_frame, text="Interpolation").grid(row=6, column=0, sticky=tk.W, pady=5)
+        self.interpolation_var = tk.StringVar(value=self.interpolation)
+        self.interpolation_combo = ttk.Combobox(control_frame, textvariable=self.interpolation_var, state="readonly")
+        self.interpolation_combo['values'] = INTERPOLATION_MODES
+        self.interpolation_combo.grid(row=6, column=1, sticky=tk.W, pady=5)
+        self.interpolation_combo.bind("<<ComboboxSelected>>", lambda e: self.update_preview())
+        
+        # Ordered dithering against banding on large, low-contrast gradients
+        ttk.Label(control_frame, text="Dithering").grid(row=7, column=0, sticky=tk.W, pady=5)
+        self.dither_var = tk.BooleanVar(value=self.dither)
+        ttk.Checkbutton(control_frame, text="Reduce banding", variable=self.dither_var,
+                        command=self.update_preview).grid(row=7, column=1, sticky=tk.W, pady=5)
+        
         # Image Size
-        ttk.Label(control_frame, text="Image Size (in pixels)").grid(row=5, column=0, sticky=tk.W, pady=5)
+        ttk.Label(control_frame, text="Image Size (in pixels)").grid(row=8, column=0, sticky=tk.W, pady=5)
         size_frame = ttk.Frame(control_frame)
-        size_frame.grid(row=5, column=1, sticky=tk.W, pady=5)
+        size_frame.grid(row=8, column=1, sticky=tk.W, pady=5)
         
         ttk.Label(size_frame, text="Width:").pack(side=tk.LEFT)
         self.width_entry = ttk.Entry(size_frame, width=6)
@@ -217,9 +322,9 @@ class GradientImageGenerator:
         self.swap_button.pack(side=tk.LEFT, padx=5)
         
         # Aspect Ratio
-        ttk.Label(control_frame, text="Aspect Ratio").grid(row=6, column=0, sticky=tk.W, pady=5)
+        ttk.Label(control_frame, text="Aspect Ratio").grid(row=9, column=0, sticky=tk.W, pady=5)
         ratio_frame = ttk.Frame(control_frame)
-        ratio_frame.grid(row=6, column=1, sticky=tk.W, pady=5)
+        ratio_frame.grid(row=9, column=1, sticky=tk.W, pady=5)
         
         self.ratio_var = tk.StringVar(value=self.aspect_ratio)
         self.ratio_combo = ttk.Combobox(ratio_frame, textvariable=self.ratio_var, state="readonly", width=10)
@@ -239,13 +344,13 @@ class GradientImageGenerator:
         self.ratio_combo.bind("<<ComboboxSelected>>", self._on_ratio_change)
         
         # Zoom control for preview
-        ttk.Label(control_frame, text="Preview Zoom").grid(row=7, column=0, sticky=tk.W, pady=5)
+        ttk.Label(control_frame, text="Preview Zoom").grid(row=10, column=0, sticky=tk.W, pady=5)
         zoom_frame = ttk.Frame(control_frame)
-        zoom_frame.grid(row=7, column=1, sticky=tk.W, pady=5)
+        zoom_frame.grid(row=10, column=1, sticky=tk.W, pady=5)
         
         # Zoom slider
         self.zoom_var = tk.DoubleVar(value=self.zoom_factor)
-        self.zoom_slider = ttk.Scale(zoom_frame, from_=0.5, to=2.0, orient=tk.HORIZONTAL, 
+        self.zoom_slider = ttk.Scale(zoom_frame, from_=0.5, to=MAX_ZOOM, orient=tk.HORIZONTAL, 
                                     variable=self.zoom_var, length=150, command=self._on_zoom_change)
         self.zoom_slider.pack(side=tk.LEFT)
         
@@ -254,23 +359,24 @@ class GradientImageGenerator:
         self.zoom_label.pack(side=tk.LEFT, padx=5)
         
         # CSS code display
-        ttk.Label(control_frame, text="CSS code").grid(row=8, column=0, sticky=tk.W, pady=5)
+        ttk.Label(control_frame, text="CSS code").grid(row=11, column=0, sticky=tk.W, pady=5)
         self.css_text = tk.Text(control_frame, height=3, width=40)
-        self.css_text.grid(row=8, column=1, sticky=tk.W, pady=5)
+        self.css_text.grid(row=11, column=1, sticky=tk.W, pady=5)
         
         # Progress bar for image generation
-        ttk.Label(control_frame, text="Generation Progress").grid(row=9, column=0, sticky=tk.W, pady=5)
+        self.progress_label = ttk.Label(control_frame, text="Generation Progress")
+        self.progress_label.grid(row=12, column=0, sticky=tk.W, pady=5)
         self.progress_var = tk.DoubleVar(value=0)
         self.progress_bar = ttk.Progressbar(control_frame, variable=self.progress_var, maximum=100)
-        self.progress_bar.grid(row=9, column=1, sticky=tk.EW, pady=5)
+        self.progress_bar.grid(row=12, column=1, sticky=tk.EW, pady=5)
         
         # Status label
         self.status_label = ttk.Label(control_frame, text="Ready")
-        self.status_label.grid(row=10, column=0, columnspan=2, sticky=tk.W, pady=5)
+        self.status_label.grid(row=13, column=0, columnspan=2, sticky=tk.W, pady=5)
         
         # Update and Save buttons
         button_frame = ttk.Frame(control_frame)
-        button_frame.grid(row=11, column=0, columnspan=2, pady=10)
+        button_frame.grid(row=14, column=0, columnspan=2, pady=10)
         
         self.update_button = ttk.Button(button_frame, text="Update Preview", command=self.update_preview)
         self.update_button.pack(side=tk.LEFT, padx=5)
@@ -291,6 +397,11 @@ class GradientImageGenerator:
         self.preview_label = ttk.Label(self.preview_frame)
         self.preview_label.pack(fill=tk.BOTH, expand=True)
         
+        # Drag the preview to pan around when zoomed in
+        self.preview_label.bind("<ButtonPress-1>", self._on_pan_start)
+        self.preview_label.bind("<B1-Motion>", self._on_pan_drag)
+        self.preview_label.bind("<ButtonRelease-1>", self._on_pan_end)
+        
         # Add a minimum size to the preview frame
         self.preview_frame.update_idletasks()
         min_width = 300
@@ -336,15 +447,15 @@ class GradientImageGenerator:
     
     def _toggle_controls(self):
         if self.gradient_type == "linear":
-            self.direction_label.grid(row=3, column=0, sticky=tk.W, pady=5)
-            self.direction_combo.grid(row=3, column=1, sticky=tk.W, pady=5)
+            self.direction_label.grid(row=4, column=0, sticky=tk.W, pady=5)
+            self.direction_combo.grid(row=4, column=1, sticky=tk.W, pady=5)
             self.position_label.grid_remove()
             self.position_combo.grid_remove()
         else:  # radial
             self.direction_label.grid_remove()
             self.direction_combo.grid_remove()
-            self.position_label.grid(row=3, column=0, sticky=tk.W, pady=5)
-            self.position_combo.grid(row=3, column=1, sticky=tk.W, pady=5)
+            self.position_label.grid(row=4, column=0, sticky=tk.W, pady=5)
+            self.position_combo.grid(row=4, column=1, sticky=tk.W, pady=5)
     
     def _update_primary_preview(self, color):
         try:
@@ -366,27 +477,30 @@ class GradientImageGenerator:
         color = self.primary_entry.get()
         if color.startswith('#') and (len(color) == 7 or len(color) == 4):
             self._update_primary_preview(color)
-            self.update_preview()
+            self.schedule_preview()
     
     def _on_secondary_color_change(self, event):
         color = self.secondary_entry.get()
         if color.startswith('#') and (len(color) == 7 or len(color) == 4):
             self._update_secondary_preview(color)
-            self.update_preview()
+            self.schedule_preview()
     
     def _on_width_change(self, event):
         try:
             new_width = int(self.width_entry.get())
             if new_width > 0 and self.ratio_var.get() != "Custom":
-                # Calculate new height based on aspect ratio
+                # Calculate new height based on aspect ratio; tiny widths
+                # would otherwise round the height down to zero
                 ratio_parts = self.ratio_var.get().split(":")
                 width_ratio = int(ratio_parts[0])
                 height_ratio = int(ratio_parts[1])
-                new_height = int(new_width * height_ratio / width_ratio)
+                new_height = max(1, int(new_width * height_ratio / width_ratio))
                 
                 # Update height entry
                 self.height_entry.delete(0, tk.END)
                 self.height_entry.insert(0, str(new_height))
+            if new_width > 0:
+                self.schedule_preview()
         except ValueError:
             # Invalid input, ignore
             pass
@@ -399,11 +513,13 @@ class GradientImageGenerator:
                 ratio_parts = self.ratio_var.get().split(":")
                 width_ratio = int(ratio_parts[0])
                 height_ratio = int(ratio_parts[1])
-                new_width = int(new_height * width_ratio / height_ratio)
+                new_width = max(1, int(new_height * width_ratio / height_ratio))
                 
                 # Update width entry
                 self.width_entry.delete(0, tk.END)
                 self.width_entry.insert(0, str(new_width))
+            if new_height > 0:
+                self.schedule_preview()
         except ValueError:
             # Invalid input, ignore
             pass
@@ -418,7 +534,7 @@ class GradientImageGenerator:
                     ratio_parts = selected_ratio.split(":")
                     width_ratio = int(ratio_parts[0])
                     height_ratio = int(ratio_parts[1])
-                    new_height = int(current_width * height_ratio / width_ratio)
+                    new_height = max(1, int(current_width * height_ratio / width_ratio))
                     
                     # Update height entry
                     self.height_entry.delete(0, tk.END)
@@ -463,90 +579,146 @@ class GradientImageGenerator:
                abs(self._last_window_size[1] - current_height) > 10:
                 # Store the new size
                 self._last_window_size = (current_width, current_height)
-                # Update the preview after a short delay to avoid too many updates
-                self.root.after(100, self.update_preview)
+                # Update the preview once resizing pauses
+                self.schedule_preview()
             
-    def check_queue(self):
-        """Check if there are any images in the queue and update the UI"""
+    def _wake_ui(self):
+        """Ask the Tk thread to run check_queue; safe to call from any thread"""
+        with self._wake_lock:
+            if self._wake_pending:
+                return
+            self._wake_pending = True
+            self._wake_requested_at = time.perf_counter()
         try:
+            # event_generate is marshalled to the Tk thread by tkinter
+            self.root.event_generate(QUEUE_EVENT, when="tail")
+        except (RuntimeError, tk.TclError) as e:
+            # The main loop isn't running (e.g. the window is being closed)
+            with self._wake_lock:
+                self._wake_pending = False
+            print(f"Failed to wake the UI: {e}")
+    
+    def _post(self, target_queue, item):
+        """Queue an item for the Tk thread and wake it up"""
+        target_queue.put(item)
+        self._wake_ui()
+    
+    def _show_preview(self, preview_image, posted_at=None):
+        """Display a PIL image in the preview label"""
+        # Ensure the preview image is properly sized
+        preview_width, preview_height = self._calculate_preview_size()
+        # Resize if the dimensions don't match (could happen during window resize)
+        if (preview_image.width, preview_image.height) != (preview_width, preview_height):
+            preview_image = preview_image.resize((preview_width, preview_height), LANCZOS)
+        
+        # Clear old photo images to prevent memory issues
+        if len(self.photo_images) > 10:  # Keep only the last 10 images
+            self.photo_images = self.photo_images[-10:]
+        
+        # Create new PhotoImage and store reference
+        with profiler.stage("ui.photo_image", width=preview_image.width, height=preview_image.height):
+            photo_image = ImageTk.PhotoImage(preview_image)
+        self.photo_images.append(photo_image)  # Store reference to prevent garbage collection
+        self.preview_label.config(image=photo_image)
+        
+        if posted_at is not None:
+            # Time from a worker queuing the preview to it being on screen
+            profiler.record_wait("ui.preview_latency", time.perf_counter() - posted_at)
+    
+    def _set_progress_visible(self, visible):
+        if visible:
+            self.progress_label.grid()
+            self.progress_bar.grid()
+        else:
+            self.progress_label.grid_remove()
+            self.progress_bar.grid_remove()
+    
+    def check_queue(self, event=None):
+        """Drain the worker queues and update the UI
+        
+        Runs on the Tk thread whenever a worker generates QUEUE_EVENT.
+        """
+        with self._wake_lock:
+            self._wake_pending = False
+            if self._wake_requested_at is not None:
+                profiler.record_wait("ui.wake", time.perf_counter() - self._wake_requested_at)
+        with profiler.stage("ui.check_queue"):
+            self._drain_queues()
+    
+    def _drain_queues(self):
+        """Apply everything the preview and export workers have queued"""
+        try:
+            # Check for preview updates; only the newest frame is worth showing
+            latest_preview = None
+            latest_progress = None
+            while True:
+                try:
+                    generation, progress, preview_image, posted_at = self.preview_queue.get_nowait()
+                except queue.Empty:
+                    break
+                profiler.record_wait("ui.preview_queue", time.perf_counter() - posted_at)
+                if generation != self.generation_id:
+                    continue
+                latest_progress = progress
+                if preview_image is not None:
+                    latest_preview = (preview_image, posted_at)
+            
+            if latest_preview is not None:
+                try:
+                    self._show_preview(*latest_preview)
+                except Exception as e:
+                    print(f"Error processing preview image: {e}")
+            if latest_progress is not None:
+                self.progress_var.set(latest_progress)
+                # Only update status text if we're still generating
+                # This prevents overwriting the "Generation Completed" message
+                if self.is_generating:
+                    self.status_label.config(text=f"Generating... {int(latest_progress)}%")
+            
             # Check for completed full-size images
-            while not self.image_queue.empty():
-                image, is_preview = self.image_queue.get_nowait()
-                if not is_preview:
-                    self.gradient_image = image
+            while True:
+                try:
+                    generation, image, error = self.image_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if generation != self.generation_id:
+                    # Result of a superseded or cancelled generation
+                    continue
+                if error is not None:
+                    self.is_generating = False
+                    self.enable_controls()
+                    self.status_label.config(text=f"Error: {error}")
+                elif image is not None:
+                    self.preview_image = image
+                    self.image_params = self.generating_params
                     self.is_generating = False
                     self.enable_controls()
                     self.status_label.config(text="Generation Completed")
                     self.progress_var.set(100)
                     
                     # Hide the progress bar and its label after generation is complete
-                    for widget in self.root.winfo_children():
-                        if isinstance(widget, ttk.Frame):
-                            for child in widget.winfo_children():
-                                if isinstance(child, ttk.Frame):
-                                    for grandchild in child.winfo_children():
-                                        if isinstance(grandchild, ttk.Label) and grandchild.cget("text") == "Generation Progress":
-                                            grandchild.grid_remove()
-                                            # Also hide the progress bar which is at the same row
-                                            for sibling in grandchild.master.winfo_children():
-                                                if isinstance(sibling, ttk.Progressbar):
-                                                    sibling.grid_remove()
-                    
-                    # Update preview with the new full image
-                    preview_width, preview_height = self._calculate_preview_size()
-                    # Use high-quality downsampling with antialiasing
-                    preview_image = self.gradient_image.resize((preview_width, preview_height), LANCZOS)
-                    
-                    # Clear old photo images to prevent memory issues
-                    if len(self.photo_images) > 10:  # Keep only the last 10 images
-                        self.photo_images = self.photo_images[-10:]
-                    
-                    # Create new PhotoImage and store reference
-                    photo_image = ImageTk.PhotoImage(preview_image)
-                    self.photo_images.append(photo_image)  # Store reference to prevent garbage collection
-                    self.preview_label.config(image=photo_image)
+                    self._set_progress_visible(False)
                     
                     # Update CSS code
                     self.update_css_code()
             
-            # Check for preview updates
-            while not self.preview_queue.empty():
+            # Check for export progress and results
+            while True:
                 try:
-                    progress, preview_image = self.preview_queue.get_nowait()
-                    if preview_image:
-                        # Ensure the preview image is properly sized
-                        preview_width, preview_height = self._calculate_preview_size()
-                        # Resize if the dimensions don't match (could happen during window resize)
-                        if (preview_image.width, preview_image.height) != (preview_width, preview_height):
-                            preview_image = preview_image.resize((preview_width, preview_height), LANCZOS)
-                        
-                        # Clear old photo images to prevent memory issues
-                        if len(self.photo_images) > 10:  # Keep only the last 10 images
-                            self.photo_images = self.photo_images[-10:]
-                        
-                        # Create new PhotoImage and store reference
-                        photo_image = ImageTk.PhotoImage(preview_image)
-                        self.photo_images.append(photo_image)  # Store reference to prevent garbage collection
-                        self.preview_label.config(image=photo_image)
-                    self.progress_var.set(progress)
-                    
-                    # Only update status text if we're still generating
-                    # This prevents overwriting the "Generation Completed" message
-                    if self.is_generating:
-                        self.status_label.config(text=f"Generating... {int(progress)}%")
-                except Exception as e:
-                    print(f"Error processing preview image: {e}")
+                    event = self.export_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._handle_export_event(*event)
         except Exception as e:
             print(f"Error in queue processing: {e}")
         
-        # Schedule the next queue check
-        self.root.after(100, self.check_queue)
-        
     def disable_controls(self):
-        """Disable controls during image generation"""
+        """Disable controls during image generation
+        
+        Saving stays available: exports render the full-size image
+        themselves and don't depend on the preview.
+        """
         self.update_button.config(state=tk.DISABLED)
-        self.save_png_button.config(state=tk.DISABLED)
-        self.save_jpg_button.config(state=tk.DISABLED)
         self.cancel_button.config(state=tk.NORMAL)
         
     def enable_controls(self):
@@ -554,15 +726,20 @@ class GradientImageGenerator:
         self.update_button.config(state=tk.NORMAL)
         self.save_png_button.config(state=tk.NORMAL)
         self.save_jpg_button.config(state=tk.NORMAL)
-        self.cancel_button.config(state=tk.DISABLED)
+        # Cancel stays available while exports are running
+        self.cancel_button.config(state=tk.NORMAL if self.export_worker.active_jobs() else tk.DISABLED)
         
     def cancel_generation(self):
-        """Cancel the current image generation process"""
+        """Cancel the current image generation process, or running exports if idle"""
         if self.is_generating and self.generation_thread and self.generation_thread.is_alive():
             self.is_generating = False
+            # The engine checks the token between strips and stops right away
+            self.cancel_event.set()
             self.status_label.config(text="Generation cancelled")
             self.enable_controls()
-            # Thread will terminate on its own by checking self.is_generating
+        elif self.export_worker.active_jobs():
+            self.export_worker.cancel_all()
+            self.status_label.config(text="Cancelling export...")
     
     def _calculate_preview_size(self):
         # Get the available size for the preview
@@ -587,8 +764,9 @@ class GradientImageGenerator:
         # Use the smaller scaling factor to ensure the image fits within the preview area
         scale_factor = min(width_scale, height_scale)
         
-        # Apply the zoom factor
-        scale_factor *= self.zoom_factor
+        # Zooming out shrinks the preview; zooming in keeps it at the fitted
+        # size and shows a smaller window of the image instead
+        scale_factor *= min(1.0, self.zoom_factor)
         
         # Calculate the new dimensions - ensure they're at least 1 pixel
         # Use math.ceil to avoid zero-sized dimensions and ensure complete coverage
@@ -606,16 +784,67 @@ class GradientImageGenerator:
         zoom_percentage = int(self.zoom_factor * 100)
         self.zoom_label.config(text=f"{zoom_percentage}%")
         
-        # Update the preview
-        self.update_preview()
+        # Update the preview once the slider stops moving
+        self.schedule_preview()
+    
+    def _calculate_viewport(self):
+        """Return the visible window (x0, y0, x1, y1) in image pixels, or None when zoomed out
+        
+        The window is 1/zoom of the image in each dimension, centered on
+        view_center but kept inside the image.
+        """
+        if self.zoom_factor <= 1.0:
+            return None
+        view_width = self.width / self.zoom_factor
+        view_height = self.height / self.zoom_factor
+        center_x = min(max(self.view_center[0] * self.width, view_width / 2), self.width - view_width / 2)
+        center_y = min(max(self.view_center[1] * self.height, view_height / 2), self.height - view_height / 2)
+        return (center_x - view_width / 2, center_y - view_height / 2,
+                center_x + view_width / 2, center_y + view_height / 2)
+    
+    def _on_pan_start(self, event):
+        if self.zoom_factor > 1.0:
+            self._pan_anchor = (event.x, event.y, self.view_center)
+    
+    def _on_pan_drag(self, event):
+        if self._pan_anchor is None or self.preview_image is None:
+            return
+        start_x, start_y, (center_x, center_y) = self._pan_anchor
+        # One preview pixel covers 1/zoom of the image's fitted size; dragging
+        # moves the image with the pointer, so the view moves the other way
+        fraction_x = (event.x - start_x) / (self.preview_image.width * self.zoom_factor)
+        fraction_y = (event.y - start_y) / (self.preview_image.height * self.zoom_factor)
+        half_x = 0.5 / self.zoom_factor
+        half_y = 0.5 / self.zoom_factor
+        self.view_center = (min(max(center_x - fraction_x, half_x), 1 - half_x),
+                            min(max(center_y - fraction_y, half_y), 1 - half_y))
+        self.render_scheduler.request(PAN_DEBOUNCE_MS)
+    
+    def _on_pan_end(self, event):
+        self._pan_anchor = None
+    
+    def schedule_preview(self):
+        """Request a preview update for an interactive edit (debounced)"""
+        self.render_scheduler.request()
     
     def update_preview(self):
+        # Any debounced request is covered by this update, which reads the latest state
+        self.render_scheduler.cancel()
+        
         # Get current values from UI
         new_primary_color = self.primary_entry.get()
         new_secondary_color = self.secondary_entry.get()
+        try:
+            new_stops = parse_color_stops(self.stops_entry.get())
+        except ValueError as e:
+            # Keep the last good preview until the stop list is fixed
+            self.status_label.config(text=f"Invalid color stops: {e}")
+            return
         new_gradient_type = self.gradient_var.get()
         new_direction = self.direction_var.get()
         new_position = self.position_var.get()
+        new_interpolation = self.interpolation_var.get()
+        new_dither = self.dither_var.get()
         
         try:
             new_width = int(self.width_entry.get())
@@ -625,46 +854,55 @@ class GradientImageGenerator:
             new_width = 2000
             new_height = 3000
         
-        # Check if we're already generating an image
-        if self.is_generating:
-            self.status_label.config(text="Already generating an image, please wait or cancel")
-            return
-            
-        # Check if any parameters have changed since last generation
-        if (self.gradient_image is not None and 
-            new_primary_color == self.primary_color and 
-            new_secondary_color == self.secondary_color and 
-            new_gradient_type == self.gradient_type and 
-            new_direction == self.direction and 
-            new_position == self.position and 
-            new_width == self.width and 
-            new_height == self.height):
+        # The preview is rendered at exactly the size it is shown at, so the
+        # preview size is part of what defines it (zoom and window resizes)
+        self.width = new_width
+        self.height = new_height
+        preview_width, preview_height = self._calculate_preview_size()
+        viewport = self._calculate_viewport()
+        
+        new_params = (new_primary_color, new_secondary_color, new_stops, new_gradient_type,
+                      new_direction, new_position, new_interpolation, new_dither,
+                      new_width, new_height,
+                      preview_width, preview_height, viewport)
+        
+        # Check if the parameters match the render in flight or the last completed one
+        current_params = self.generating_params if self.is_generating else self.image_params
+        if new_params == current_params:
             # No changes, just update the CSS code and return
             self.update_css_code()
             return
         
+        # A new request supersedes the one in flight
+        self.cancel_event.set()
+        
         # Update instance variables with new values
         self.primary_color = new_primary_color
         self.secondary_color = new_secondary_color
+        self.stops = new_stops
         self.gradient_type = new_gradient_type
         self.direction = new_direction
         self.position = new_position
-        self.width = new_width
-        self.height = new_height
+        self.interpolation = new_interpolation
+        self.dither = new_dither
         
         # Update status
         self.is_generating = True
+        self.generating_params = new_params
+        self.generation_id += 1
+        self.cancel_event = threading.Event()
         self.progress_var.set(0)
+        self._set_progress_visible(True)
         self.status_label.config(text="Starting generation...")
         self.disable_controls()
         
-        # First generate a small preview quickly
-        preview_width, preview_height = self._calculate_preview_size()
-        
-        # Start a thread for image generation
+        # Start a thread for preview generation; it gets a snapshot of the spec
+        # so later edits can't change a render halfway through. The full-size
+        # image is only rendered when it is exported.
         self.generation_thread = threading.Thread(
-            target=self._generate_image_async, 
-            args=(self.width, self.height, preview_width, preview_height)
+            target=profiler.wrap(self._generate_preview_async), 
+            args=(self.generation_id, self.cancel_event, self.current_spec(),
+                  preview_width, preview_height, viewport, (new_width, new_height))
         )
         self.generation_thread.daemon = True
         self.generation_thread.start()
@@ -672,165 +910,119 @@ class GradientImageGenerator:
         # Update CSS code immediately
         self.update_css_code()
     
-    def _generate_image_async(self, width, height, preview_width, preview_height):
-        """Generate the gradient image in a separate thread with progress updates"""
+    def _generate_preview_async(self, generation, cancel, spec, preview_width, preview_height,
+                                viewport=None, image_size=None):
+        """Generate the preview image in a separate thread with progress updates
+        
+        The gradient is a closed-form function of the pixel position, so the
+        preview is rendered directly at preview resolution; no full-size
+        render or downsampling is involved.
+        
+        Args:
+            generation: Id of this generation, used to drop results once superseded
+            cancel: threading.Event set when this generation is cancelled or superseded
+            spec: GradientSpec snapshot to render
+            viewport: Visible window (x0, y0, x1, y1) of the full image, or None for all of it
+            image_size: (width, height) of the full image the viewport refers to
+        """
+        def report(progress, image=None):
+            # PhotoImage objects should only be created in the main thread,
+            # so the PIL image goes through the queue
+            self._post(self.preview_queue, (generation, progress, image, time.perf_counter()))
+        
         try:
-            # First generate a small preview quickly - generate at slightly higher resolution
-            # to ensure quality, then resize down to the exact preview size
-            preview_scale = 1.5  # Generate at 1.5x the needed size for better quality
-            temp_preview_width = int(preview_width * preview_scale)
-            temp_preview_height = int(preview_height * preview_scale)
-            
-            # Generate high-quality preview
-            preview_image = self.create_gradient_image(temp_preview_width, temp_preview_height, is_preview=True)
-            # Resize to exact preview dimensions with high-quality downsampling
-            preview_image = preview_image.resize((preview_width, preview_height), LANCZOS)
+            # Progressive preview: tiny renders upscaled to the preview size
+            for scale, progress in PREVIEW_STAGES:
+                stage_width = max(1, round(preview_width * scale))
+                stage_height = max(1, round(preview_height * scale))
+                # Stage images are throwaway, so they stay out of the disk cache
+                stage_image = self.create_gradient_image(stage_width, stage_height, spec=spec, cancel=cancel,
+                                                         viewport=viewport, image_size=image_size, persist=False)
+                with profiler.stage("preview.upscale", scale=scale):
+                    stage_image = stage_image.resize((preview_width, preview_height), BILINEAR)
+                report(progress, stage_image)
             
-            # Put a copy of the PIL Image in the queue, not the PhotoImage
-            # PhotoImage objects should only be created in the main thread
-            self.preview_queue.put((10, preview_image.copy()))
-            
-            # Generate the full image in one go, without blocks
-            # Check if generation was cancelled before starting
-            if not self.is_generating:
-                return
-                
-            # Update progress to indicate we're starting the main generation
-            self.preview_queue.put((20, None))
+            # Final stage at exactly the preview size, reporting real progress
+            base_percent = PREVIEW_STAGES[-1][1]
+            last_percent = [base_percent]
             
-            # For large images, we'll still provide progress updates during generation
-            # by updating the preview at regular intervals
-            is_large_image = width * height > 1000000  # If image is larger than ~1 megapixel
+            def on_rows(rows_done, total_rows):
+                percent = base_percent + int((100 - base_percent) * rows_done / total_rows)
+                if percent != last_percent[0]:
+                    last_percent[0] = percent
+                    report(percent)
             
-            # Generate the full image at once
-            full_image = self.create_gradient_image(width, height, is_preview=False)
+            preview_image = self.create_gradient_image(preview_width, preview_height, spec=spec, cancel=cancel,
+                                                       progress=on_rows, viewport=viewport, image_size=image_size)
+            report(100, preview_image)
             
-            # Check if generation was cancelled after creating the image
-            if not self.is_generating:
-                return
-                
-            # For large images, provide a progress update with the completed image
-            if is_large_image:
-                # Create a preview of the completed image
-                preview = full_image.resize((preview_width, preview_height), LANCZOS)
-                # Put a copy of the PIL Image in the queue with 90% progress
-                self.preview_queue.put((90, preview.copy()))
-                
-                # Give the main thread a chance to process
-                time.sleep(0.01)
-            else:
-                # For smaller images, just update to 90% progress
-                self.preview_queue.put((90, None))
-            
-            # Update progress to 100% before putting the completed image in the queue
-            self.preview_queue.put((100, None))
-            
-            # Put the completed image in the queue
-            self.image_queue.put((full_image, False))
+            # Put the completed preview in the queue
+            self._post(self.image_queue, (generation, preview_image, None))
         
+        except RenderCancelled:
+            # Cancelled or superseded; a newer generation owns the UI now
+            pass
         except Exception as e:
             print(f"Error in image generation: {e}")
-            self.status_label.config(text=f"Error: {e}")
-            self.is_generating = False
-            self.enable_controls()
+            # Tk widgets must only be touched from the main thread
+            self._post(self.image_queue, (generation, None, e))
+    
+    def current_spec(self):
+        """Return a GradientSpec snapshot of the current gradient settings"""
+        return GradientSpec(
+            primary_color=self.primary_color,
+            secondary_color=self.secondary_color,
+            gradient_type=self.gradient_type,
+            direction=self.direction,
+            position=self.position,
+            stops=self.stops,
+            interpolation=self.interpolation,
+            dither=self.dither
+        )
     
-    def create_gradient_image(self, width, height, is_preview=False):
+    def create_gradient_image(self, width, height, spec=None, cancel=None, progress=None,
+                              viewport=None, image_size=None, persist=True):
         """Create a gradient image with the specified dimensions
         
         Args:
             width: Image width
             height: Image height
-            is_preview: Whether this is a preview image (lower quality for speed)
+            spec: GradientSpec to render (defaults to the current settings)
+            cancel: Optional threading.Event; the render raises RenderCancelled once set
+            progress: Optional callable receiving (rows_done, height) after each strip
+            viewport: Optional window (x0, y0, x1, y1) of the full image to render at
+                width x height, instead of the whole image
+            image_size: (width, height) of the full image (defaults to the current size)
+            persist: Whether the render may be written to the disk cache
         """
-        # Parse colors once
-        r1, g1, b1 = int(self.primary_color[1:3], 16), int(self.primary_color[3:5], 16), int(self.primary_color[5:7], 16)
-        r2, g2, b2 = int(self.secondary_color[1:3], 16), int(self.secondary_color[3:5], 16), int(self.secondary_color[5:7], 16)
-        
-        # Create numpy arrays for the RGB channels
-        rgb_array = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        if self.gradient_type == "linear":
-            # Create coordinate arrays
-            y_coords, x_coords = np.mgrid[0:height, 0:width]
-            
-            # Calculate the ratio based on direction using vectorized operations
-            if self.direction == "left-to-right":
-                ratio = x_coords / width
-            elif self.direction == "right-to-left":
-                ratio = 1 - (x_coords / width)
-            elif self.direction == "top-to-bottom":
-                ratio = y_coords / height
-            elif self.direction == "bottom-to-top":
-                ratio = 1 - (y_coords / height)
-            elif self.direction == "top-left-to-bottom-right":
-                ratio = (x_coords / width + y_coords / height) / 2
-            elif self.direction == "top-right-to-bottom-left":
-                ratio = ((width - x_coords) / width + y_coords / height) / 2
-            elif self.direction == "bottom-left-to-top-right":
-                ratio = (x_coords / width + (height - y_coords) / height) / 2
-            elif self.direction == "bottom-right-to-top-left":
-                ratio = ((width - x_coords) / width + (height - y_coords) / height) / 2
-            else:
-                ratio = (x_coords / width + y_coords / height) / 2  # Default
-            
-            # Interpolate between colors using vectorized operations
-            r = (r1 * (1 - ratio) + r2 * ratio).astype(np.uint8)
-            g = (g1 * (1 - ratio) + g2 * ratio).astype(np.uint8)
-            b = (b1 * (1 - ratio) + b2 * ratio).astype(np.uint8)
-            
-            # Assign the RGB values to the array
-            rgb_array[..., 0] = r
-            rgb_array[..., 1] = g
-            rgb_array[..., 2] = b
-        else:
-            # Radial gradient using vectorized operations
-            # Set center point based on position
-            if self.position == "center":
-                center_x, center_y = width // 2, height // 2
-            elif self.position == "top":
-                center_x, center_y = width // 2, 0
-            elif self.position == "top-right":
-                center_x, center_y = width, 0
-            elif self.position == "right":
-                center_x, center_y = width, height // 2
-            elif self.position == "bottom-right":
-                center_x, center_y = width, height
-            elif self.position == "bottom":
-                center_x, center_y = width // 2, height
-            elif self.position == "bottom-left":
-                center_x, center_y = 0, height
-            elif self.position == "left":
-                center_x, center_y = 0, height // 2
-            elif self.position == "top-left":
-                center_x, center_y = 0, 0
-            else:  # Default to center
-                center_x, center_y = width // 2, height // 2
-                
-            max_dist = (width**2 + height**2)**0.5 / 2
-            
-            # Create coordinate arrays
-            y_coords, x_coords = np.mgrid[0:height, 0:width]
-            
-            # Calculate distances from center
-            dist = np.sqrt((x_coords - center_x)**2 + (y_coords - center_y)**2)
-            ratio = np.minimum(1.0, dist / max_dist)
-            
-            # Interpolate between colors using vectorized operations
-            r = (r1 * (1 - ratio) + r2 * ratio).astype(np.uint8)
-            g = (g1 * (1 - ratio) + g2 * ratio).astype(np.uint8)
-            b = (b1 * (1 - ratio) + b2 * ratio).astype(np.uint8)
-            
-            # Assign the RGB values to the array
-            rgb_array[..., 0] = r
-            rgb_array[..., 1] = g
-            rgb_array[..., 2] = b
-        
-        # Convert the numpy array to a PIL Image
-        image = Image.fromarray(rgb_array)
-        
-        return image
+        spec = spec or self.current_spec()
+        with profiler.stage("render", width=width, height=height, viewport=viewport is not None):
+            return self._render_image(width, height, spec, cancel, progress, viewport, image_size, persist)
+    
+    def _render_image(self, width, height, spec, cancel, progress, viewport, image_size, persist):
+        """Render for create_gradient_image, from the cache when possible"""
+        if viewport is not None:
+            # Zoomed-in views only evaluate the visible window, so they are
+            # cheap to re-render and are not cached
+            image_width, image_height = image_size or (self.width, self.height)
+            array = render_region(spec, *viewport, width, height, image_width, image_height,
+                                  cancel=cancel, progress=progress)
+            return Image.fromarray(array)
+        
+        # Rendering itself lives in the Tk-free engine module; previews are
+        # too small to benefit from more than one thread
+        array = self.render_cache.get_or_render(
+            spec, width, height,
+            lambda spec, w, h: render_array(spec, w, h, cancel=cancel, progress=progress,
+                                            index_field=self.geometry_cache.get_or_compute(spec, w, h, cancel)),
+            persist=persist
+        )
+        return Image.fromarray(array)
     
     def update_css_code(self):
+        # CSS Color 4 names the same interpolation spaces; srgb is the CSS default
+        method_css = f" in {self.interpolation}" if self.interpolation != "srgb" else ""
+        stops_css = ", ".join(f"{color} {offset * 100:g}%" for offset, color in self.current_spec().color_stops())
         if self.gradient_type == "linear":
             direction_css = {
                 "left-to-right": "to right",
@@ -839,7 +1031,7 @@ class GradientImageGenerator:
                 "top-right-to-bottom-left": "225deg"
             }.get(self.direction, "135deg")
             
-            css = f"background: linear-gradient({direction_css}, {self.primary_color} 0%, {self.secondary_color} 100%);"
+            css = f"background: linear-gradient({direction_css}{method_css}, {stops_css});"
         else:
             # Map position to CSS position
             position_css = {
@@ -854,82 +1046,93 @@ class GradientImageGenerator:
                 "top-left": "top left"
             }.get(self.position, "center")
             
-            css = f"background: radial-gradient(circle at {position_css}, {self.primary_color} 0%, {self.secondary_color} 100%);"
+            css = f"background: radial-gradient(circle at {position_css}{method_css}, {stops_css});"
         
         self.css_text.delete(1.0, tk.END)
         self.css_text.insert(tk.END, css)
     
     def save_png(self):
-        # Check if we have a valid image to save
-        if self.is_generating:
-            self.status_label.config(text="Cannot save while generating image")
-            return
-        if self.gradient_image is None:
-            self.status_label.config(text="No image to save")
-            return
-            
-        color1 = self.primary_color[1:]  # Remove '#'
-        color2 = self.secondary_color[1:]  # Remove '#'
-        gradient_type = "lg" if self.gradient_type == "linear" else "rg"
-        default_name = f"{color1}-{color2}_{gradient_type}_{self.width}x{self.height}.png"
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".png",
-            filetypes=[("PNG files", "*.png")],
-            title="Save PNG Image",
-            initialfile=default_name
-        )
-        if file_path:
-            try:
-                self.status_label.config(text="Saving PNG...")
-                # Store current image before saving
-                current_image = self.gradient_image
-                current_image.save(file_path, "PNG")
-                self.status_label.config(text="The file has been saved successfully.")
-                # Ensure we don't trigger unnecessary UI updates
-                self.root.update_idletasks()
-                # Clear status message after 3 seconds
-                self.root.after(3000, lambda: self.status_label.config(text=""))
-            except Exception as e:
-                self.status_label.config(text=f"Error saving PNG: {e}")
-                print(f"Error saving PNG: {e}")
+        self._save_image("png")
     
     def save_jpg(self):
-        # Check if we have a valid image to save
-        if self.is_generating:
-            self.status_label.config(text="Cannot save while generating image")
+        self._save_image("jpg")
+    
+    def _save_image(self, image_format):
+        """Ask for a file name and hand the export to the export worker"""
+        label = image_format.upper()
+        # Make sure a pending edit is applied before saving
+        if self.render_scheduler.pending:
+            self.update_preview()
+        spec = self.current_spec()
+        try:
+            # An unparsable stop list leaves the previous stops in the spec,
+            # so check the entry itself rather than export a stale gradient
+            parse_color_stops(self.stops_entry.get())
+        except ValueError:
+            self.status_label.config(text="Cannot save: invalid color stops")
             return
-        if self.gradient_image is None:
-            self.status_label.config(text="No image to save")
+        try:
+            spec.normalized()
+        except ValueError as e:
+            self.status_label.config(text=f"Cannot save: {e}")
             return
             
-        color1 = self.primary_color[1:]  # Remove '#'
-        color2 = self.secondary_color[1:]  # Remove '#'
-        gradient_type = "lg" if self.gradient_type == "linear" else "rg"
-        default_name = f"{color1}-{color2}_{gradient_type}_{self.width}x{self.height}.jpg"
+        default_name = default_filename(spec, self.width, self.height, image_format)
+        if image_format == "png":
+            filetypes = [("PNG files", "*.png")]
+            title = "Save PNG Image"
+        else:
+            filetypes = [("JPEG files", "*.jpg")]
+            title = "Save JPEG Image"
         file_path = filedialog.asksaveasfilename(
-            defaultextension=".jpg",
-            filetypes=[("JPEG files", "*.jpg")],
-            title="Save JPEG Image",
+            defaultextension=f".{image_format}",
+            filetypes=filetypes,
+            title=title,
             initialfile=default_name
         )
         if file_path:
-            try:
-                self.status_label.config(text="Saving JPG...")
-                # Store current image before saving
-                current_image = self.gradient_image
-                # Convert to RGB mode if needed (in case we're using RGBA)
-                rgb_image = current_image.convert('RGB')
-                rgb_image.save(file_path, "JPEG", quality=95)
-                self.status_label.config(text="The file has been saved successfully.")
-                # Ensure we don't trigger unnecessary UI updates
-                self.root.update_idletasks()
-                # Clear status message after 3 seconds
-                self.root.after(3000, lambda: self.status_label.config(text=""))
-            except Exception as e:
-                self.status_label.config(text=f"Error saving JPG: {e}")
-                print(f"Error saving JPG: {e}")
+            # The full-size image is only rendered now, on an export thread:
+            # PNG streams rows from the engine, JPEG renders then encodes
+            self.export_worker.submit(spec, self.width, self.height, file_path, image_format)
+            self.status_label.config(text=f"Saving {label}...")
+            self.cancel_button.config(state=tk.NORMAL)
+    
+    def _handle_export_event(self, kind, job, value):
+        """Show progress and results reported by the export worker"""
+        label = job.image_format.upper()
+        if kind == "progress":
+            # Generation status takes precedence while a render is running
+            if not self.is_generating:
+                self.status_label.config(text=f"Saving {label}... {value}%")
+            return
+        
+        if kind == "done":
+            self.status_label.config(text="The file has been saved successfully.")
+            # Clear status message after 3 seconds
+            self.root.after(3000, lambda: self.status_label.config(text=""))
+        elif kind == "cancelled":
+            self.status_label.config(text=f"Saving {label} cancelled")
+        else:
+            self.status_label.config(text=f"Error saving {label}: {value}")
+            print(f"Error saving {label}: {value}")
+        
+        if not self.is_generating and not self.export_worker.active_jobs():
+            self.cancel_button.config(state=tk.DISABLED)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gradient image generator")
+    parser.add_argument("--profile", action="store_true",
+                        help="time each render, UI and export stage and print a summary on exit")
+    parser.add_argument("--profile-trace", metavar="PATH",
+                        help="also write a Chrome trace (chrome://tracing, Perfetto) on exit")
+    parser.add_argument("--profile-cprofile", metavar="PATH", help="also write cProfile stats on exit")
+    args = parser.parse_args()
+    # GRADIENT_PROFILE* environment variables work as well
+    configure_from_env()
+    if args.profile or args.profile_trace or args.profile_cprofile:
+        profiler.enable(trace_path=args.profile_trace or profiler.trace_path,
+                        cprofile_path=args.profile_cprofile or profiler.cprofile_path)
+    
     root = tk.Tk()
     app = GradientImageGenerator(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,238 @@
+"""Opt-in instrumentation for finding where render time goes.
+
+Code marks its stages with ``profiler.stage("name")`` and reports queue
+waits with ``profiler.record_wait("name", seconds)``. Both do nothing
+until the profiler is enabled, so the hooks can stay in hot paths.
+
+Enable it with environment variables (or the GUI's ``--profile*`` flags):
+
+    GRADIENT_PROFILE=1                     print a per-stage summary at exit
+                                           ("0", "false" or empty leave it off)
+    GRADIENT_PROFILE_TRACE=trace.json      write a Chrome trace at exit
+                                           (open in chrome://tracing or Perfetto)
+    GRADIENT_PROFILE_CPROFILE=session.prof write cProfile stats at exit
+                                           (python -m pstats session.prof)
+
+Like the engine, this module does not import tkinter.
+"""
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+
+class _NullStage:
+    """Context manager returned while profiling is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Times one stage and the memory allocated while it runs"""
+
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.memory = tracemalloc.get_traced_memory()[0] if self.profiler.track_memory else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter()
+        allocated = None
+        if self.memory is not None:
+            allocated = tracemalloc.get_traced_memory()[0] - self.memory
+        self.profiler._add_event(self.name, "stage", self.start, end - self.start, allocated, self.args)
+        return False
+
+
+class Profiler:
+    """Collects stage timings, allocations and queue waits from every thread
+
+    Memory is tracked with tracemalloc, which NumPy reports its buffers to.
+    The figure is the net change in traced memory over a stage, so
+    temporaries freed before the stage ends don't count; stages running
+    concurrently on other threads are included.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self.trace_path = None
+        self.cprofile_path = None
+        self._events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._profiles = []
+        self._main_profile = None
+        self._exit_registered = False
+
+    def enable(self, trace_path=None, cprofile_path=None, track_memory=True, summary_at_exit=True):
+        """Start collecting
+
+        Args:
+            trace_path: Write a Chrome trace here when the session ends
+            cprofile_path: Run cProfile on this thread and on threads started
+                through wrap(), and write the merged stats here at the end
+            track_memory: Measure bytes allocated per stage (slows rendering)
+            summary_at_exit: Print summary() when the interpreter exits
+        """
+        self.enabled = True
+        self.trace_path = trace_path
+        self.cprofile_path = cprofile_path
+        self.track_memory = track_memory
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if cprofile_path and self._main_profile is None:
+            self._main_profile = cProfile.Profile()
+            self._main_profile.enable()
+            self._profiles.append(self._main_profile)
+        if not self._exit_registered:
+            self._exit_registered = True
+            atexit.register(self.finish, summary_at_exit)
+
+    def stage(self, name, **args):
+        """Return a context manager timing the ``name`` stage (a no-op when disabled)"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, args)
+
+    def record_wait(self, name, seconds):
+        """Record that an item spent ``seconds`` waiting in the ``name`` queue"""
+        if self.enabled:
+            now = time.perf_counter()
+            self._add_event(name, "wait", now - seconds, seconds, None, None)
+
+    def wrap(self, func):
+        """Return ``func`` wrapped to run under its own cProfile profiler
+
+        Used for thread targets, since cProfile only sees the thread it was
+        enabled on. Returns ``func`` unchanged unless cProfile is active.
+        """
+        if not (self.enabled and self.cprofile_path):
+            return func
+
+        def profiled(*args, **kwargs):
+            profile = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profile)
+            return profile.runcall(func, *args, **kwargs)
+        return profiled
+
+    def _add_event(self, name, kind, start, duration, allocated, args):
+        with self._lock:
+            self._events.append((name, kind, start, duration, allocated,
+                                 threading.current_thread().name, args))
+
+    def summary(self):
+        """Return per-stage totals as ``{name: {...}}``, sorted by total time"""
+        with self._lock:
+            events = list(self._events)
+        totals = {}
+        for name, kind, _, duration, allocated, _, _ in events:
+            entry = totals.setdefault(name, {"kind": kind, "count": 0, "total_s": 0.0, "max_s": 0.0,
+                                             "allocated_bytes": 0 if allocated is not None else None})
+            entry["count"] += 1
+            entry["total_s"] += duration
+            entry["max_s"] = max(entry["max_s"], duration)
+            if allocated is not None and entry["allocated_bytes"] is not None:
+                entry["allocated_bytes"] += allocated
+        for entry in totals.values():
+            entry["mean_s"] = entry["total_s"] / entry["count"]
+        return dict(sorted(totals.items(), key=lambda item: -item[1]["total_s"]))
+
+    def format_summary(self):
+        """Return summary() as a text table"""
+        lines = [f"{'stage':<28} {'kind':<6} {'count':>6} {'total ms':>10} {'mean ms':>9} "
+                 f"{'max ms':>9} {'alloc MB':>9}"]
+        for name, entry in self.summary().items():
+            allocated = entry["allocated_bytes"]
+            allocated = f"{allocated / 1e6:9.1f}" if allocated is not None else f"{'-':>9}"
+            lines.append(f"{name:<28} {entry['kind']:<6} {entry['count']:>6} {entry['total_s'] * 1000:10.1f} "
+                         f"{entry['mean_s'] * 1000:9.2f} {entry['max_s'] * 1000:9.2f} {allocated}")
+        return "\n".join(lines)
+
+    def dump_chrome_trace(self, file_path):
+        """Write the recorded events in Chrome's Trace Event format"""
+        with self._lock:
+            events = list(self._events)
+        thread_ids = {}
+        trace_events = []
+        for name, kind, start, duration, allocated, thread, args in events:
+            tid = thread_ids.setdefault(thread, len(thread_ids) + 1)
+            trace_args = dict(args or {})
+            if allocated is not None:
+                trace_args["allocated_bytes"] = allocated
+            trace_events.append({
+                "name": name,
+                "cat": kind,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": trace_args,
+            })
+        for thread, tid in thread_ids.items():
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                                 "args": {"name": thread}})
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, file)
+
+    def dump_cprofile(self, file_path):
+        """Merge every thread's cProfile stats and write them to ``file_path``"""
+        if self._main_profile is not None:
+            self._main_profile.disable()
+        with self._lock:
+            profiles = list(self._profiles)
+        if profiles:
+            pstats.Stats(*profiles).dump_stats(file_path)
+
+    def finish(self, print_summary=True):
+        """Write the configured output files; called automatically at exit"""
+        if not self.enabled:
+            return
+        try:
+            if print_summary:
+                print(self.format_summary())
+            if self.trace_path:
+                self.dump_chrome_trace(self.trace_path)
+                print(f"Chrome trace written to {self.trace_path}")
+            if self.cprofile_path:
+                self.dump_cprofile(self.cprofile_path)
+                print(f"cProfile stats written to {self.cprofile_path}")
+        except OSError as e:
+            print(f"Failed to write profile: {e}")
+
+
+# Shared profiler used by the GUI and the export worker
+profiler = Profiler()
+
+
+def _env_flag(value):
+    """Read a boolean environment variable; unset, empty, "0", "false", "no" and "off" are off"""
+    return value is not None and value.strip().lower() not in ("", "0", "false", "no", "off")
+
+
+def configure_from_env(environ=None):
+    """Enable ``profiler`` if GRADIENT_PROFILE is true or an output path variable is set"""
+    environ = os.environ if environ is None else environ
+    trace_path = environ.get("GRADIENT_PROFILE_TRACE") or None
+    cprofile_path = environ.get("GRADIENT_PROFILE_CPROFILE") or None
+    if _env_flag(environ.get("GRADIENT_PROFILE")) or trace_path or cprofile_path:
+        profiler.enable(trace_path=trace_path, cprofile_path=cprofile_path)
+    return profiler
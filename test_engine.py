@@ -0,0 +1,67 @@
+"""Regression tests for gradient_engine
+
+Run with ``python -m pytest -q``. The engine is checked against the original
+full-grid renderer kept in benchmark.py, and every rendering path (strips,
+worker threads, cached index fields, windowed rendering) must agree with
+``render_array`` pixel for pixel.
+"""
+import numpy as np
+import pytest
+
+from benchmark import legacy_render_array
+from gradient_engine import (GradientSpec, LINEAR_DIRECTIONS, RADIAL_POSITIONS, index_field,
+                             iter_strips, render_array, render_into, render_region)
+
+# Odd sizes catch off-by-one errors at centers and mirror axes
+SIZES = [(37, 53), (101, 17)]
+
+SPECS = ([GradientSpec("#1a2b3c", "#f0e0d0", "linear", direction, "center")
+          for direction in LINEAR_DIRECTIONS] +
+         [GradientSpec("#1a2b3c", "#f0e0d0", "radial", "left-to-right", position)
+          for position in RADIAL_POSITIONS])
+
+
+def spec_id(spec):
+    return spec.direction if spec.gradient_type == "linear" else f"radial-{spec.position}"
+
+
+@pytest.mark.parametrize("width, height", SIZES)
+@pytest.mark.parametrize("spec", SPECS, ids=spec_id)
+def test_matches_legacy_renderer(spec, width, height):
+    # The engine rounds where the original truncated, so allow one level
+    expected = legacy_render_array(spec, width, height).astype(np.int16)
+    assert np.abs(render_array(spec, width, height) - expected).max() <= 1
+
+
+@pytest.mark.parametrize("dither", [False, True], ids=["plain", "dither"])
+@pytest.mark.parametrize("width, height", SIZES)
+@pytest.mark.parametrize("spec", SPECS, ids=spec_id)
+def test_render_paths_agree(spec, width, height, dither):
+    spec = spec._replace(dither=dither)
+    expected = render_array(spec, width, height)
+
+    # Small memory budgets force many strips
+    strips = np.concatenate([strip for _, strip in iter_strips(spec, width, height, max_memory=4096)])
+    assert np.array_equal(strips, expected)
+    threaded = np.concatenate([strip for _, strip in
+                               iter_strips(spec, width, height, max_memory=4096, workers=3)])
+    assert np.array_equal(threaded, expected)
+
+    out = np.empty_like(expected)
+    render_into(spec, out, max_memory=4096, workers=3)
+    assert np.array_equal(out, expected)
+
+    field = index_field(spec, width, height)
+    assert np.array_equal(render_array(spec, width, height, index_field=field), expected)
+
+    if not dither:
+        # Dithered windows anchor the threshold tile at the window origin
+        region = render_region(spec, 0, 0, width, height, width, height, width, height)
+        assert np.array_equal(region, expected)
+
+
+@pytest.mark.parametrize("window, size", [((0, 0, 10, 10), (0, 5)), ((0, 0, 10, 10), (5, 0)),
+                                          ((4, 0, 4, 10), (5, 5)), ((0, 6, 10, 2), (5, 5))])
+def test_render_region_rejects_empty_output(window, size):
+    with pytest.raises(ValueError):
+        render_region(SPECS[0], *window, *size, 10, 10)